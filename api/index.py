@@ -1,13 +1,23 @@
 """
 Vercel serverless function entry point for FastAPI app.
 This file is required by Vercel to locate the serverless function.
+
+Vercel's Python runtime speaks ASGI natively, so the app is exported directly
+(no Mangum adapter). The FastAPI app (and LangChain/OpenAI/Supabase behind it)
+is imported on the first request instead of at module import to keep
+cold-start init short.
 """
-from app.main import app
-from mangum import Mangum
+_asgi_app = None
 
-# Wrap FastAPI app with Mangum for AWS Lambda/Vercel compatibility
-handler = Mangum(app, lifespan="off")
 
-# Export for Vercel
-__all__ = ["handler", "app"]
+async def app(scope, receive, send):
+    global _asgi_app
+    if _asgi_app is None:
+        from app.main import app as fastapi_app
+
+        _asgi_app = fastapi_app
+    await _asgi_app(scope, receive, send)
 
+
+# Export for Vercel
+__all__ = ["app"]
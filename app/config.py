@@ -1,25 +1,49 @@
-from pydantic_settings import BaseSettings
-from pydantic import Field
-
-
-class Settings(BaseSettings):
-    supabase_url: str = Field(..., alias="SUPABASE_URL")
-    supabase_anon_key: str = Field(..., alias="SUPABASE_ANON_KEY")
-    supabase_service_role_key: str = Field(..., alias="SUPABASE_SERVICE_ROLE_KEY")
-    supabase_jwt_secret: str | None = Field(None, alias="SUPABASE_JWT_SECRET")
-    database_url: str | None = Field(None, alias="DATABASE_URL")
-
-    gemini_api_key: str | None = Field(None, alias="GEMINI_API_KEY")  # Deprecated, kept for backward compatibility
-    openai_api_key: str = Field(..., alias="OPENAI_API_KEY")
-
-    cors_origins: str | None = Field("*", alias="CORS_ORIGINS")
-    log_level: str | None = Field("info", alias="LOG_LEVEL")
-
-    class Config:
-        env_file = ".env"
-        extra = "ignore"
-
-
-settings = Settings()  # type: ignore[call-arg]
-
-
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+
+load_dotenv(".env")
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    supabase_url: str
+    supabase_anon_key: str
+    supabase_service_role_key: str
+    supabase_jwt_secret: str | None
+    database_url: str | None
+
+    gemini_api_key: str | None  # Deprecated, kept for backward compatibility
+    openai_api_key: str
+    openai_api_base: str | None  # OpenAI-compatible endpoint (e.g. a self-hosted vLLM server)
+    openai_requests_per_minute: int  # Client-side cap on chat completion requests (0 disables)
+    llm_timeout_s: float  # Upper bound on one analysis LLM call before the handler gives up
+
+    cors_origins: str | None
+    serve_static: bool  # Serve the chat UI at / and /static (disable for API-only deployments)
+    log_level: str | None
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Read settings from environment variables (plain env-var bag, no validation)."""
+    return Settings(
+        supabase_url=os.environ["SUPABASE_URL"],
+        supabase_anon_key=os.environ["SUPABASE_ANON_KEY"],
+        supabase_service_role_key=os.environ["SUPABASE_SERVICE_ROLE_KEY"],
+        supabase_jwt_secret=os.environ.get("SUPABASE_JWT_SECRET"),
+        database_url=os.environ.get("DATABASE_URL"),
+        gemini_api_key=os.environ.get("GEMINI_API_KEY"),
+        openai_api_key=os.environ["OPENAI_API_KEY"],
+        openai_api_base=os.environ.get("OPENAI_API_BASE"),
+        openai_requests_per_minute=int(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", "500")),
+        llm_timeout_s=float(os.environ.get("LLM_TIMEOUT_S", "20")),
+        cors_origins=os.environ.get("CORS_ORIGINS", "*"),
+        serve_static=os.environ.get("SERVE_STATIC", "true").lower() not in ("0", "false", "no"),
+        log_level=os.environ.get("LOG_LEVEL", "info"),
+    )
+
+
+settings = get_settings()
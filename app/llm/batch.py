@@ -0,0 +1,114 @@
+"""
+OpenAI Batch API helpers for high-volume, non-interactive analyses.
+Batch requests are billed at half price and use a separate rate-limit pool,
+at the cost of up to 24h turnaround - use them for backfills and re-scoring
+jobs, never for interactive requests.
+
+Note: LangChain's `.batch()` only fans out regular API calls; it does not use
+the Batch API.
+"""
+import io
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+from langchain_core.messages import convert_to_openai_messages
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.llm.embeddings import get_openai_client
+
+
+_CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def submit_batch(
+    prompt: ChatPromptTemplate,
+    inputs: List[Dict[str, Any]],
+    model_name: str = "gpt-4o-mini",
+    temperature: float = 0,
+    custom_ids: Optional[List[str]] = None,
+    **request_kwargs: Any,
+) -> str:
+    """
+    Render each input through `prompt` and submit them as one Batch API job.
+
+    Args:
+        prompt: Chat prompt template used for every request
+        inputs: Template variables, one dict per request
+        model_name: OpenAI chat model name (default: gpt-4o-mini)
+        temperature: Sampling temperature (default 0)
+        custom_ids: Request ids used to match results (default: input index)
+        **request_kwargs: Extra chat completion parameters (e.g. tools, response_format)
+
+    Returns:
+        The batch id
+    """
+    if custom_ids is None:
+        custom_ids = [str(i) for i in range(len(inputs))]
+
+    jsonl = io.BytesIO()
+    for custom_id, variables in zip(custom_ids, inputs):
+        body = {
+            "model": model_name,
+            "temperature": temperature,
+            "messages": convert_to_openai_messages(prompt.format_messages(**variables)),
+            **request_kwargs,
+        }
+        jsonl.write(orjson.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": _CHAT_COMPLETIONS_URL,
+            "body": body,
+        }))
+        jsonl.write(b"\n")
+
+    client = get_openai_client()
+    batch_file = client.files.create(file=("batch.jsonl", jsonl.getvalue()), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=_CHAT_COMPLETIONS_URL,
+        completion_window="24h",
+    )
+    print(f"✅ Submitted batch {batch.id} with {len(custom_ids)} requests")
+    return batch.id
+
+
+def wait_for_batch(batch_id: str, poll_interval: float = 60.0):
+    """Poll a batch until it reaches a terminal status and return it."""
+    client = get_openai_client()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(f"🔍 Batch {batch_id}: {batch.status} ({counts.completed}/{counts.total} completed)")
+        if batch.status in _TERMINAL_STATUSES:
+            return batch
+        time.sleep(poll_interval)
+
+
+def get_batch_results(batch) -> Dict[str, Dict[str, Any]]:
+    """
+    Download the output of a finished batch.
+
+    Args:
+        batch: Batch object returned by `wait_for_batch`
+
+    Returns:
+        Mapping of custom_id to the chat completion response body. Requests
+        that failed are omitted.
+    """
+    if not batch.output_file_id:
+        return {}
+
+    content = get_openai_client().files.content(batch.output_file_id).read()
+    results = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") == 200:
+            results[record["custom_id"]] = response["body"]
+        else:
+            print(f"⚠️ Batch request {record.get('custom_id')} failed: {record.get('error')}")
+    return results
@@ -1,110 +1,356 @@
 """
 LangChain chains for various career guidance tasks.
 """
-from langchain_core.output_parsers import JsonOutputParser
+import asyncio
+import orjson
+from langchain_core.messages import SystemMessage
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from langchain_core.output_parsers.openai_tools import JsonOutputKeyToolsParser
+from langchain_core.outputs import Generation
 from langchain_core.prompts import ChatPromptTemplate
-from typing import Dict, Any, List
+from langchain_core.runnables import RunnableGenerator
+from typing import Dict, Any, List, AsyncIterator, Iterator, Optional
+from functools import lru_cache
 from app.llm.llm_client import (
-    get_openai_llm,
+    get_task_llm,
+    with_prompt_cache_key,
+    create_career_coach_prompt,
+    create_resume_parser_prompt,
     create_skill_gap_analyst_prompt,
     create_job_fit_analyst_prompt,
+    create_job_fit_screener_prompt,
+    create_job_fit_analyst_batch_prompt,
 )
+from app.llm.prompts import CAREER_RECOMMENDATION_SYSTEM_PROMPT, SALARY_RANGES
+from app.llm.semantic_cache import LLMChainWithCache
+from app.utils.json_utils import to_json
+from app.models.schemas import ResumeExtraction, SkillGapResult, JobFitResult, JobFitScreenResult, JobFitBatchResult
 
 
+class _OrjsonOutputParser(JsonOutputParser):
+    """JsonOutputParser that decodes complete outputs with orjson."""
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False) -> Any:
+        # JSON mode returns a bare object, so the final parse is a single orjson.loads;
+        # partial (streaming) parses and anything unexpected use the tolerant parser
+        if not partial:
+            try:
+                return orjson.loads(result[0].text)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse_result(result, partial=partial)
+
+
+# The parser is stateless, so one instance is shared by all chains.
+# It still yields partial results while streaming.
+_JSON_PARSER = _OrjsonOutputParser()
+
+# OpenAI JSON mode guarantees a syntactically valid JSON object (no prose or
+# markdown fences around it)
+_JSON_MODE = {"response_format": {"type": "json_object"}}
+
+_prompt_cache_stats = {"requests": 0, "cached_requests": 0}
+
+
+def _record_prompt_cache(usage: Dict[str, Any]) -> None:
+    """Log how many prompt tokens were served from OpenAI's prompt cache."""
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+    _prompt_cache_stats["requests"] += 1
+    if cached_tokens:
+        _prompt_cache_stats["cached_requests"] += 1
+    hit_ratio = _prompt_cache_stats["cached_requests"] / _prompt_cache_stats["requests"]
+    print(f"🔍 Prompt cache: {cached_tokens}/{usage.get('input_tokens', 0)} input tokens cached (hit ratio {hit_ratio:.0%})")
+
+
+# Pass-through generators (rather than a plain function) so streamed chunks
+# still reach the parser incrementally
+def _log_prompt_cache(chunks: Iterator[Any]) -> Iterator[Any]:
+    for chunk in chunks:
+        usage = getattr(chunk, "usage_metadata", None)
+        if usage:
+            _record_prompt_cache(usage)
+        yield chunk
+
+
+async def _alog_prompt_cache(chunks: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    async for chunk in chunks:
+        usage = getattr(chunk, "usage_metadata", None)
+        if usage:
+            _record_prompt_cache(usage)
+        yield chunk
+
+
+_PROMPT_CACHE_LOGGER = RunnableGenerator(_log_prompt_cache, _alog_prompt_cache)
+
+
+def _with_function_calling(llm, schema):
+    """
+    Force a single function call whose arguments follow `schema`.
+    Strict mode makes OpenAI enforce the schema server-side (structured outputs),
+    so the prompt needs no output-format boilerplate and the arguments always
+    parse; returns (bound llm, parser yielding the arguments as a dict).
+    """
+    tool_name = schema.__name__
+    bound = llm.bind_tools([schema], tool_choice=tool_name, strict=True, parallel_tool_calls=False)
+    return bound, JsonOutputKeyToolsParser(key_name=tool_name, first_tool_only=True)
+
+# Longest role names first so the most specific role in a title wins
+_SALARY_ROLES = sorted(((role.lower(), salary) for role, salary in SALARY_RANGES.items()), key=lambda item: -len(item[0]))
+
+
+def _salary_for(title: Any) -> Optional[str]:
+    if not isinstance(title, str):
+        return None
+    title = title.lower()
+    for role, salary in _SALARY_ROLES:
+        if role in title:
+            return salary
+    return None
+
+
+def _apply_salary_ranges(result: Any) -> Any:
+    """Replace model-generated salary ranges with the reference range for known roles."""
+    careers = result.get("careers") if isinstance(result, dict) else result
+    if isinstance(careers, list):
+        for career in careers:
+            if isinstance(career, dict):
+                salary = _salary_for(career.get("title"))
+                if salary:
+                    career["salary_range"] = salary
+    return result
+
+
+def _fill_salary_ranges(partials: Iterator[Any]) -> Iterator[Any]:
+    for partial in partials:
+        yield _apply_salary_ranges(partial)
+
+
+async def _afill_salary_ranges(partials: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    async for partial in partials:
+        yield _apply_salary_ranges(partial)
+
+
+_SALARY_FILLER = RunnableGenerator(_fill_salary_ranges, _afill_salary_ranges)
+
+
+def _canonical_skills(value: Any) -> str:
+    """Lowercase, dedupe and sort a JSON-encoded skill list so reorderings embed identically."""
+    try:
+        skills = orjson.loads(value) if isinstance(value, str) else value
+    except ValueError:
+        return str(value)
+    if not isinstance(skills, list):
+        return str(value)
+    return to_json(sorted({str(skill).strip().lower() for skill in skills if str(skill).strip()}))
+
+
+def _canonicalize_skill_gap_input(input: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "user_skills": _canonical_skills(input.get("user_skills", "")),
+        "job_skills": _canonical_skills(input.get("job_skills", "")),
+    }
+
+
+def _profile_name(profile_json: Any) -> str:
+    try:
+        profile = orjson.loads(profile_json)
+    except (TypeError, ValueError):
+        return ""
+    return str(profile.get("name", "") or "").strip() if isinstance(profile, dict) else ""
+
+
+def _job_fit_guard(input: Dict[str, Any]) -> str:
+    """The rationale addresses the candidate by name, so only reuse answers for the same name."""
+    return _profile_name(input.get("profile", "")).lower()
+
+
+@lru_cache(maxsize=1)
 def get_career_recommendation_chain():
-    """Chain for career path recommendations based on user profile."""
-    llm = get_openai_llm(temperature=0.7)
+    """Chain for career path recommendations based on user profile (built once, then reused)."""
+    llm = get_task_llm("career_recommendation", temperature=0.7)
     prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are Career Guidance, an expert career guidance coach for the Indian job market. 
-Based on the user's skills and experience, recommend 3-5 relevant career paths for the Indian market. 
-For each path, you should be able to provide details on: Salary, Day-to-day work, Required Skills, Job Outlook.
-
-CRITICAL RECOMMENDATION LOGIC:
-1. FIRST, analyze the user's skills to identify their PRIMARY DOMAIN (most important step):
-   
-   ML/AI DOMAIN INDICATORS (HIGHEST PRIORITY):
-   - Explicit domain skills: "Machine Learning", "Deep Learning", "Natural Language Processing", "NLP", "Computer Vision", "AI", "Artificial Intelligence"
-   - ML/AI libraries: Pandas, NumPy, Scikit-learn, TensorFlow, PyTorch, LangChain, Keras, XGBoost
-   - If user has ANY of these → ALWAYS prioritize ML/AI roles FIRST (Machine Learning Engineer, AI Engineer, Data Scientist, NLP Engineer, Deep Learning Engineer)
-   
-   DATA SCIENCE DOMAIN INDICATORS:
-   - Data skills: SQL, Statistical Modeling, Power BI, Matplotlib, Seaborn, Data Analysis
-   - If user has data skills but NO explicit ML/AI domain skills → Prioritize Data Scientist, Data Analyst, Business Analyst roles
-   
-   WEB DEVELOPMENT DOMAIN INDICATORS:
-   - Web frameworks: React, Node.js, Angular, Vue.js, Express.js
-   - Frontend: HTML, CSS, JavaScript, TypeScript, Bootstrap, TailwindCSS
-   - If user has web frameworks AND NO ML/AI domain skills → Prioritize Web Developer roles
-   - If user has ONLY basic HTML/CSS but has ML/AI skills → DO NOT prioritize web dev roles
-   
-   BACKEND/ENTERPRISE DOMAIN INDICATORS:
-   - Java, Spring Boot, Microservices, Enterprise patterns
-   - If user has Java/Spring AND NO ML/AI domain skills → Prioritize Backend/Java Developer roles
-
-2. DOMAIN PRIORITY RULES (CRITICAL):
-   - If user has "Machine Learning", "Deep Learning", "Natural Language Processing", or "AI" in their skills → ML/AI roles are MANDATORY top recommendations
-   - If user has both ML/AI domain skills AND web skills → Prioritize ML/AI roles (web skills are secondary)
-   - Generic HTML/CSS/Java/SQL are NOT sufficient to recommend web dev roles if user has ML/AI domain skills
-   - ONLY recommend web development if ML/AI domain skills are ABSENT
-
-3. MATCHING THRESHOLD:
-   - ONLY recommend careers that genuinely match at least 40% of the user's PRIMARY DOMAIN skills
-   - For ML/AI profiles: Recommend Machine Learning Engineer, AI Engineer, Data Scientist, NLP Engineer, Deep Learning Engineer
-   - For Web Dev profiles: Recommend Full Stack Developer, Frontend Developer, Backend Developer
-
-4. EXAMPLES:
-   - User with ["Python", "Machine Learning", "Deep Learning", "HTML", "CSS"] → Recommend ML Engineer, AI Engineer, Data Scientist (NOT Web Developer)
-   - User with ["Python", "React", "Node.js", "JavaScript"] → Recommend Full Stack Developer, Web Developer
-   - User with ["Python", "Machine Learning", "Natural Language Processing", "SQL"] → Recommend ML Engineer, NLP Engineer, Data Scientist
-
-CRITICAL CONTEXT REQUIREMENTS:
-- ALL information MUST be specific to INDIA and the Indian job market
-- ALL salary information MUST be in Indian Rupees (INR) format: ₹X LPA - ₹Y LPA (e.g., ₹8 LPA - ₹15 LPA)
-- Use REALISTIC Indian IT market salary ranges (NOT just USD conversions). Typical ranges:
-  * Software Engineer: ₹6-20 LPA (entry to senior)
-  * Data Scientist: ₹8-25 LPA
-  * Machine Learning Engineer: ₹10-30 LPA
-  * Data Analyst: ₹5-15 LPA
-  * AI Engineer: ₹10-28 LPA
-  * MLOps Engineer: ₹12-30 LPA
-  * Data Engineer: ₹8-22 LPA
-  * Business Analyst: ₹6-18 LPA
-  * DevOps Engineer: ₹8-22 LPA
-  * Product Manager: ₹12-35 LPA
-  * Backend Developer: ₹6-18 LPA
-  * Frontend Developer: ₹5-16 LPA
-  * Full Stack Developer: ₹7-20 LPA
-- Use whole numbers only (no decimals like ₹124.5 LPA - use ₹12-25 LPA instead)
-- Job outlook should reflect the Indian job market trends
-- Skills and requirements should be relevant to Indian companies
-- Day-to-day work should reflect typical work culture in Indian IT/tech companies
-
-CRITICAL FORMATTING RULES:
-- Use MARKDOWN format ONLY (no HTML tags whatsoever)
-- Use **bold** for emphasis, *italics* for subtle emphasis
-- Use blank lines for paragraph breaks (NOT <br>)
-- NEVER use HTML tags like <br>, <small>, <b>, <i>, <style>, or any inline CSS
-
-Return a JSON array with career paths.
-Format: [{{"title": "...", "description": "...", "salary_range": "₹X LPA - ₹Y LPA", "outlook": "..."}}]"""),
+        SystemMessage(content=CAREER_RECOMMENDATION_SYSTEM_PROMPT),
         ("human", "User skills: {skills}\nUser experience: {experience}\n\nRecommend career paths:")
     ])
-    parser = JsonOutputParser()
-    return prompt | llm | parser
+    json_llm = with_prompt_cache_key(llm.bind(**_JSON_MODE), "career_recommendation")
+    chain = (
+        prompt | json_llm | _PROMPT_CACHE_LOGGER | _JSON_PARSER | _SALARY_FILLER
+    ).with_config(run_name="career_recommendation")
+    return LLMChainWithCache(
+        chain,
+        namespace=f"career_recommendation:{llm.model_name}:{llm.temperature}",
+    )
+
 
+@lru_cache(maxsize=1)
+def get_resume_parser_chain():
+    """Chain extracting name, email, experience and skills from resume text (built once, then reused)."""
+    llm = get_task_llm("resume_parser", temperature=0)  # Deterministic structured extraction (exact-match cached)
+    prompt = create_resume_parser_prompt()
+    structured_llm, parser = _with_function_calling(llm, ResumeExtraction)
+    return (
+        prompt | with_prompt_cache_key(structured_llm, "resume_parser") | _PROMPT_CACHE_LOGGER | parser
+    ).with_config(run_name="resume_parser")
 
+
+@lru_cache(maxsize=1)
 def get_skill_gap_chain():
-    """Chain for semantic skill gap analysis."""
-    llm = get_openai_llm(temperature=0.1)  # Low temp for structured output
+    """Chain for semantic skill gap analysis (built once, then reused)."""
+    llm = get_task_llm("skill_gap", temperature=0)  # Deterministic structured output (exact-match cached)
     prompt = create_skill_gap_analyst_prompt()
-    parser = JsonOutputParser()
-    return prompt | llm | parser
+    structured_llm, parser = _with_function_calling(llm, SkillGapResult)
+    chain = (
+        prompt | with_prompt_cache_key(structured_llm, "skill_gap") | _PROMPT_CACHE_LOGGER | parser
+    ).with_config(run_name="skill_gap")
+    # Canonical skill lists make reordered / re-cased requests hit the same entry
+    return LLMChainWithCache(
+        chain,
+        namespace=f"skill_gap:{llm.model_name}:{llm.temperature}",
+        canonicalize=_canonicalize_skill_gap_input,
+    )
 
 
+@lru_cache(maxsize=1)
 def get_job_fit_chain():
-    """Chain for job fit score analysis."""
-    llm = get_openai_llm(temperature=0.1)  # Lower temperature for stricter scoring
+    """Chain for job fit score analysis (built once, then reused)."""
+    llm = get_task_llm("job_fit", temperature=0)  # Deterministic scoring (exact-match cached)
     prompt = create_job_fit_analyst_prompt()
-    parser = JsonOutputParser()
-    return prompt | llm | parser
+    structured_llm, parser = _with_function_calling(llm, JobFitResult)
+    chain = (
+        prompt | with_prompt_cache_key(structured_llm, "job_fit") | _PROMPT_CACHE_LOGGER | parser
+    ).with_config(run_name="job_fit")
+    # Embed profile and job description separately so small profile edits still hit
+    return LLMChainWithCache(
+        chain,
+        namespace=f"job_fit:{llm.model_name}:{llm.temperature}",
+        embed_keys=["profile", "job_description"],
+        guard=_job_fit_guard,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_job_fit_screener_chain():
+    """Cheap pre-screen reporting domains and base score without a rationale (built once, then reused)."""
+    llm = get_task_llm("job_fit_screener", temperature=0)  # Deterministic screening (exact-match cached)
+    prompt = create_job_fit_screener_prompt()
+    structured_llm, parser = _with_function_calling(llm, JobFitScreenResult)
+    return (
+        prompt | with_prompt_cache_key(structured_llm, "job_fit_screener") | _PROMPT_CACHE_LOGGER | parser
+    ).with_config(run_name="job_fit_screener")
+
+
+@lru_cache(maxsize=1)
+def get_job_fit_batch_chain():
+    """
+    Chain scoring several job descriptions against one profile in a single
+    completion, so the large job-fit system prompt is sent (and billed) once
+    per batch instead of once per job (built once, then reused).
+    """
+    llm = get_task_llm("job_fit", temperature=0)  # Deterministic scoring (exact-match cached)
+    prompt = create_job_fit_analyst_batch_prompt()
+    structured_llm, parser = _with_function_calling(llm, JobFitBatchResult)
+    # Shares the job_fit cache key: both prompts start with the same system prefix
+    return (
+        prompt | with_prompt_cache_key(structured_llm, "job_fit") | _PROMPT_CACHE_LOGGER | parser
+    ).with_config(run_name="job_fit_batch")
+
+
+# Screened-out jobs: a major domain mismatch with almost no skill overlap scores
+# 0 after the -40 penalty, so the full analysis could not change the outcome
+_SCREEN_SKIP_BELOW = 20
+_DOMAIN_MISMATCH_PENALTY = 40
+
+
+def _screened_job_fit(screen: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """Build the job-fit result for a screened-out job from a template instead of the full analysis."""
+    required = screen.get("required_skills") or []
+    matched = screen.get("matched_skills") or []
+    missing = [skill for skill in required if skill not in matched]
+    base_score = max(0, min(100, int(screen.get("base_score", 0))))
+    fit_score = max(0, base_score - _DOMAIN_MISMATCH_PENALTY)
+    profile_domain = screen.get("profile_domain") or "Other"
+    job_domain = screen.get("job_domain") or "Other"
+    owner = f"{name}'s" if name else "Your"
+    rationale = (
+        f"{owner} profile is in the {profile_domain} domain, while this job is {job_domain}. "
+        f"The job requires: {', '.join(required) or 'not specified'}. "
+        f"Matched: {', '.join(matched) or 'none'} ({len(matched)} out of {len(required)} skills matched = {base_score}%). "
+        f"Missing: {', '.join(missing) or 'none'}. "
+        f"Major domain mismatch: {profile_domain} profile → {job_domain} job (-{_DOMAIN_MISMATCH_PENALTY} points). "
+        f"Final: {base_score}% - {_DOMAIN_MISMATCH_PENALTY} = {fit_score}/100. "
+        f"GUIDANCE: This role requires a different skill set. Focus on roles in the {profile_domain} domain, "
+        f"or if you want to move into {job_domain}, start with the missing fundamentals listed above."
+    )
+    return {"fit_score": fit_score, "rationale": rationale}
+
+
+async def ascore_job_fit(profile: str, job_description: str) -> Dict[str, Any]:
+    """
+    Score job fit, using a cheap screener to short-circuit clear mismatches.
+    A semantic-cache hit for the full analysis is returned without any LLM call.
+    On a miss the screener and the full analysis start together: clear domain
+    mismatches with almost no skill overlap get a templated result and the full
+    analysis is cancelled; everything else (including any screener failure)
+    returns the full analysis, so screening adds no latency.
+    
+    Args:
+        profile: JSON-encoded profile (name, email, experience, skills)
+        job_description: Job description text
+    
+    Returns:
+        Dict with fit_score and rationale
+    """
+    inputs = {"profile": profile, "job_description": job_description}
+    job_fit_chain = get_job_fit_chain()
+    cached, vector, guard = await job_fit_chain.alookup(inputs)
+    if cached is not None:
+        return cached
+    
+    full_task = asyncio.create_task(job_fit_chain.acompute(inputs, vector, guard))
+    try:
+        try:
+            screen = await get_job_fit_screener_chain().ainvoke(inputs)
+            if isinstance(screen, dict) and screen.get("domain_mismatch") and int(screen.get("base_score", 100)) < _SCREEN_SKIP_BELOW:
+                print(f"✅ Job fit screened out: {screen.get('profile_domain')} → {screen.get('job_domain')} ({screen.get('base_score')}%)")
+                return _screened_job_fit(screen, _profile_name(profile))
+        except Exception as e:
+            print(f"⚠️ Job fit screener failed, using full analysis: {e}")
+        return await full_task
+    finally:
+        # Screened out, or the caller gave up (e.g. timeout): stop the full analysis
+        if not full_task.done():
+            full_task.cancel()
+
+
+async def astream_career_recommendation(skills: Any, experience: str) -> AsyncIterator[Any]:
+    """
+    Stream career recommendations as partially parsed JSON while tokens arrive.
+    Each yielded value is the most complete parse so far ({"careers": [...]}).
+    """
+    chain = get_career_recommendation_chain()
+    async for partial in chain.astream({
+        "skills": to_json(skills) if isinstance(skills, list) else str(skills),
+        "experience": experience
+    }):
+        yield partial
+
+
+@lru_cache(maxsize=1)
+def get_career_coach_chain():
+    """Conversational career-coach chain producing Markdown text (built once, then reused)."""
+    llm = get_task_llm("coach", temperature=0.7)
+    prompt = create_career_coach_prompt()
+    return (
+        prompt | with_prompt_cache_key(llm, "career_coach") | _PROMPT_CACHE_LOGGER | StrOutputParser()
+    ).with_config(run_name="career_coach")
+
 
+async def astream_career_coach(input_text: str) -> AsyncIterator[str]:
+    """
+    Stream the career coach's answer as text deltas while tokens arrive,
+    so the first words reach the user after one token-time instead of the full completion.
+    """
+    chain = get_career_coach_chain()
+    async for delta in chain.astream({"input": input_text}):
+        if delta:
+            yield delta
@@ -1,39 +1,244 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from app.config import settings
 from functools import lru_cache
+from collections import OrderedDict
+import asyncio
+import hashlib
+import threading
+import httpx
+import numpy as np
+
+
+# OpenAI accepts at most 2048 inputs per embeddings request
+_MAX_BATCH_SIZE = 2048
+_MICRO_BATCH_SIZE = 32
+_MICRO_BATCH_WAIT = 0.005  # seconds
+_EMBEDDING_CACHE_SIZE = 10_000
+
+# Shared by the sync and async pooled clients
+_HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20)
+_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# Content-addressed cache: (model_name, blake2b(text)) -> float32 embedding
+_embedding_cache: "OrderedDict[tuple[str, str], np.ndarray]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    """
+    Get the shared pooled httpx client for sync OpenAI calls (scripts, `.invoke()`
+    and the Batch API helpers), with the same HTTP/2 and pool settings as the async client.
+    """
+    return httpx.Client(http2=True, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
 
 
 @lru_cache(maxsize=1)
 def get_openai_client() -> OpenAI:
-    """Get cached OpenAI client instance."""
-    return OpenAI(api_key=settings.openai_api_key)
+    """Get cached OpenAI client instance (sync, for scripts and sync code paths)."""
+    return OpenAI(api_key=settings.openai_api_key, http_client=get_http_client())
 
 
-def embed_texts(texts: list[str], model_name: str = "text-embedding-3-small") -> list[list[float]]:
+@lru_cache(maxsize=1)
+def get_async_http_client() -> httpx.AsyncClient:
     """
-    Generate embeddings using OpenAI API.
-    
+    Get the shared pooled httpx client for async OpenAI calls.
+    Reusing one client keeps connections alive and avoids a TLS handshake per call;
+    HTTP/2 lets concurrent requests multiplex over a single connection.
+    """
+    return httpx.AsyncClient(http2=True, limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT)
+
+
+@lru_cache(maxsize=1)
+def get_async_openai_client() -> AsyncOpenAI:
+    """Get cached async OpenAI client instance backed by the shared httpx client."""
+    return AsyncOpenAI(api_key=settings.openai_api_key, http_client=get_async_http_client())
+
+
+def _cache_key(text: str, model_name: str) -> tuple[str, str]:
+    return model_name, hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _partition(texts: list[str], model_name: str):
+    """Split inputs into cached embeddings and the deduplicated uncached texts."""
+    keys = [_cache_key(text, model_name) for text in texts]
+    embeddings: list[np.ndarray | None] = [None] * len(texts)
+    uncached: dict[tuple[str, str], str] = {}
+    with _embedding_cache_lock:
+        for i, key in enumerate(keys):
+            cached = _embedding_cache.get(key)
+            if cached is not None:
+                _embedding_cache.move_to_end(key)
+                embeddings[i] = cached
+            else:
+                uncached.setdefault(key, texts[i])
+    return keys, embeddings, uncached
+
+
+def _store_batch(batch_keys, response, keys, embeddings) -> None:
+    """Backfill the cache from an embeddings response and fill matching output slots."""
+    # OpenAI embeddings are already normalized
+    with _embedding_cache_lock:
+        for key, data in zip(batch_keys, response.data):
+            _embedding_cache[key] = np.asarray(data.embedding, dtype=np.float32)
+            _embedding_cache.move_to_end(key)
+        while len(_embedding_cache) > _EMBEDDING_CACHE_SIZE:
+            _embedding_cache.popitem(last=False)
+        fetched = {key: _embedding_cache[key] for key in batch_keys}
+    for i, key in enumerate(keys):
+        if embeddings[i] is None and key in fetched:
+            embeddings[i] = fetched[key]
+
+
+def _stack(embeddings: list[np.ndarray]) -> np.ndarray:
+    if not embeddings:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack(embeddings)
+
+
+async def embed_texts(texts: list[str], model_name: str = "text-embedding-3-small") -> np.ndarray:
+    """
+    Generate embeddings using OpenAI API without blocking the event loop.
+    Previously embedded texts are served from an in-process cache; only the
+    uncached texts are sent to OpenAI, deduplicated and in as few requests as possible.
+
     Args:
         texts: List of text strings to embed
         model_name: OpenAI embedding model name (default: text-embedding-3-small)
-    
+
+    Returns:
+        Normalized embedding vectors as a float32 array of shape (len(texts), dim), in input order
+    """
+    keys, embeddings, uncached = _partition(texts, model_name)
+
+    if uncached:
+        client = get_async_openai_client()
+        uncached_keys = list(uncached)
+        try:
+            for start in range(0, len(uncached_keys), _MAX_BATCH_SIZE):
+                batch_keys = uncached_keys[start:start + _MAX_BATCH_SIZE]
+                response = await client.embeddings.create(
+                    model=model_name,
+                    input=[uncached[key] for key in batch_keys]
+                )
+                _store_batch(batch_keys, response, keys, embeddings)
+        except Exception as e:
+            raise Exception(f"OpenAI embedding API error: {e}")
+
+    return _stack(embeddings)
+
+
+def embed_texts_sync(texts: list[str], model_name: str = "text-embedding-3-small") -> np.ndarray:
+    """
+    Blocking variant of `embed_texts` for scripts and sync code paths.
+    Shares the same in-process embedding cache.
+    """
+    keys, embeddings, uncached = _partition(texts, model_name)
+
+    if uncached:
+        client = get_openai_client()
+        uncached_keys = list(uncached)
+        try:
+            for start in range(0, len(uncached_keys), _MAX_BATCH_SIZE):
+                batch_keys = uncached_keys[start:start + _MAX_BATCH_SIZE]
+                response = client.embeddings.create(
+                    model=model_name,
+                    input=[uncached[key] for key in batch_keys]
+                )
+                _store_batch(batch_keys, response, keys, embeddings)
+        except Exception as e:
+            raise Exception(f"OpenAI embedding API error: {e}")
+
+    return _stack(embeddings)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesce concurrent single-text embedding requests into one API call.
+    A background task drains up to `max_batch` queued texts (or whatever
+    arrived within `max_wait` seconds) and embeds them with one `embed_texts` call.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "text-embedding-3-small",
+        max_batch: int = _MICRO_BATCH_SIZE,
+        max_wait: float = _MICRO_BATCH_WAIT,
+    ):
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def _ensure_worker(self) -> None:
+        # The queue and worker belong to one event loop; restart them if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Embed one text, batched with any other requests in flight."""
+        # Cache hits skip the queue (and the batching delay) entirely
+        _, embeddings, _ = _partition([text], self.model_name)
+        if embeddings[0] is not None:
+            return embeddings[0]
+
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                embeddings = await embed_texts([text for text, _ in batch], self.model_name)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), embedding in zip(batch, embeddings):
+                # Callers may have been cancelled while waiting
+                if not future.done():
+                    future.set_result(embedding)
+
+
+@lru_cache(maxsize=None)
+def get_embedding_batcher(model_name: str = "text-embedding-3-small") -> EmbeddingBatcher:
+    """Get the shared micro-batcher for an embedding model."""
+    return EmbeddingBatcher(model_name)
+
+
+async def embed_text(text: str, model_name: str = "text-embedding-3-small") -> np.ndarray:
+    """
+    Embed a single text via the shared micro-batcher.
+    Concurrent callers share one OpenAI request instead of one request each.
+
+    Args:
+        text: Text to embed
+        model_name: OpenAI embedding model name (default: text-embedding-3-small)
+
     Returns:
-        List of normalized embedding vectors (list of lists of floats)
-    """
-    client = get_openai_client()
-    
-    try:
-        response = client.embeddings.create(
-            model=model_name,
-            input=texts
-        )
-        
-        # Extract embeddings from response
-        # OpenAI embeddings are already normalized
-        embeddings = [data.embedding for data in response.data]
-        return embeddings
-    except Exception as e:
-        raise Exception(f"OpenAI embedding API error: {e}")
+        Normalized float32 embedding vector
+    """
+    return await get_embedding_batcher(model_name).embed(text)
 
 
 # Keep get_embedding_model for backward compatibility (if needed)
@@ -0,0 +1,33 @@
+"""
+Static system prompts shared by the LLM chains.
+Stored as plain-text resources so prompt edits ship as data rather than code.
+They are sent as literal system messages (no template formatting), so the
+files use plain JSON braces and every request gets a byte-identical prefix
+for OpenAI's automatic prompt caching.
+"""
+import json
+from functools import lru_cache
+from importlib.resources import files
+
+
+@lru_cache(maxsize=None)
+def load_prompt(name: str) -> str:
+    """Read a prompt file from this package (read once, then memoized)."""
+    return files(__name__).joinpath(f"{name}.txt").read_text(encoding="utf-8")
+
+
+CAREER_COACH_SYSTEM_PROMPT = load_prompt("career_coach")
+CAREER_CHAT_SYSTEM_PROMPT = load_prompt("career_chat")
+RESUME_PARSER_SYSTEM_PROMPT = load_prompt("resume_parser")
+CAREER_RECOMMENDATION_SYSTEM_PROMPT = load_prompt("career")
+SKILL_GAP_SYSTEM_PROMPT = load_prompt("skill_gap")
+JOB_FIT_SYSTEM_PROMPT = load_prompt("job_fit")
+JOB_FIT_SCREENER_SYSTEM_PROMPT = load_prompt("job_fit_screener")
+CAREER_FALLBACK_SYSTEM_PROMPT = load_prompt("career_fallback")
+JOB_SKILL_EXTRACT_SYSTEM_PROMPT = load_prompt("job_skill_extract")
+
+# Reference INR salary ranges per role, applied to recommendations after
+# generation instead of being billed as prompt tokens on every call
+SALARY_RANGES: dict[str, str] = json.loads(
+    files(__name__).joinpath("salaries.json").read_text(encoding="utf-8")
+)
@@ -0,0 +1,209 @@
+"""
+Semantic response cache for LangChain chains.
+Skips the LLM call when a near-identical input has already been answered.
+"""
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from app.llm.embeddings import embed_text, embed_texts_sync
+from app.utils.json_utils import to_json
+
+
+class _SemanticStore:
+    """
+    In-process vector store of (normalized embedding, guard, orjson-serialized result)
+    entries. An entry only matches lookups carrying the same guard value.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.vectors: Optional[np.ndarray] = None
+        self.guards: List[Optional[str]] = []
+        self.values: List[Any] = []
+        self.lock = threading.Lock()
+
+    def lookup(self, vector: np.ndarray, threshold: float, guard: Optional[str] = None) -> Optional[Any]:
+        with self.lock:
+            if self.vectors is None or not self.values:
+                return None
+            similarities = self.vectors @ vector
+            # Most similar first; stop at the first entry below the threshold
+            for index in np.argsort(similarities)[::-1]:
+                if similarities[index] < threshold:
+                    break
+                if self.guards[index] == guard:
+                    return self.values[index]
+        return None
+
+    def add(self, vector: np.ndarray, value: Any, guard: Optional[str] = None) -> None:
+        with self.lock:
+            if self.vectors is None:
+                self.vectors = vector[np.newaxis, :]
+            else:
+                self.vectors = np.vstack([self.vectors, vector])
+            self.guards.append(guard)
+            self.values.append(value)
+            # Drop the oldest entries once the store is full
+            if len(self.values) > self.max_entries:
+                overflow = len(self.values) - self.max_entries
+                self.vectors = self.vectors[overflow:]
+                self.guards = self.guards[overflow:]
+                self.values = self.values[overflow:]
+
+
+# Stores are shared per namespace so every chain instance for a namespace hits the same cache
+_stores: Dict[str, _SemanticStore] = {}
+_stores_lock = threading.Lock()
+
+
+def _get_store(namespace: str, max_entries: int) -> _SemanticStore:
+    with _stores_lock:
+        store = _stores.get(namespace)
+        if store is None:
+            store = _SemanticStore(max_entries)
+            _stores[namespace] = store
+        return store
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class LLMChainWithCache(Runnable):
+    """
+    Wrap a `prompt | llm | parser` chain with a semantic response cache.
+
+    The input dict is embedded (via `embed_text`) and compared against previous
+    inputs in the same namespace. If the cosine similarity of the closest entry
+    is at least `threshold`, its stored result is returned without calling the LLM.
+
+    Args:
+        chain: Runnable to wrap
+        namespace: Cache partition, e.g. chain name + model + temperature
+        threshold: Minimum cosine similarity for a cache hit (default 0.95)
+        embed_keys: Input keys embedded separately and concatenated. When None,
+            the whole canonicalized input dict is embedded as one text.
+        max_entries: Maximum number of cached results per namespace
+        canonicalize: Optional function normalizing the input before it is
+            embedded (e.g. sorting skill lists); the chain still gets the original
+        guard: Optional function deriving an exact-match key from the input; a
+            cached result is only reused when its guard value is identical
+    """
+
+    def __init__(
+        self,
+        chain: Runnable,
+        namespace: str,
+        threshold: float = 0.95,
+        embed_keys: Optional[List[str]] = None,
+        max_entries: int = 256,
+        canonicalize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        guard: Optional[Callable[[Dict[str, Any]], str]] = None,
+    ):
+        self.chain = chain
+        self.namespace = namespace
+        self.threshold = threshold
+        self.embed_keys = embed_keys
+        self.canonicalize = canonicalize
+        self.guard = guard
+        self.store = _get_store(namespace, max_entries)
+
+    def _guard_for(self, input: Dict[str, Any]) -> Optional[str]:
+        return self.guard(input) if self.guard else None
+
+    def _texts_for(self, input: Dict[str, Any]) -> List[str]:
+        if self.canonicalize:
+            input = self.canonicalize(input)
+        if self.embed_keys:
+            return [str(input.get(key, "")) or " " for key in self.embed_keys]
+        return [to_json(input, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)]
+
+    def _to_vector(self, embeddings: np.ndarray) -> np.ndarray:
+        # Normalize each part so every embedded key carries equal weight
+        return _normalize(np.concatenate([_normalize(e) for e in embeddings]))
+
+    def _embed_input(self, input: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Embed the chain input, returning None if embeddings are unavailable."""
+        try:
+            return self._to_vector(embed_texts_sync(self._texts_for(input)))
+        except Exception as e:
+            print(f"⚠️ Semantic cache embedding failed for '{self.namespace}': {e}")
+            return None
+
+    async def _aembed_input(self, input: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Async variant of `_embed_input` that does not block the event loop."""
+        try:
+            # Each text goes through the shared micro-batcher, so concurrent requests share API calls
+            embeddings = await asyncio.gather(*(embed_text(text) for text in self._texts_for(input)))
+            return self._to_vector(np.stack(embeddings))
+        except Exception as e:
+            print(f"⚠️ Semantic cache embedding failed for '{self.namespace}': {e}")
+            return None
+
+    def _lookup(self, vector: Optional[np.ndarray], guard: Optional[str]) -> Optional[Any]:
+        if vector is None:
+            return None
+        cached = self.store.lookup(vector, self.threshold, guard)
+        if cached is not None:
+            print(f"✅ Semantic cache hit for '{self.namespace}'")
+            # Decoding the stored bytes hands each caller its own copy
+            return orjson.loads(cached)
+        return None
+
+    def _save(self, vector: Optional[np.ndarray], guard: Optional[str], result: Any) -> None:
+        # Only cache successfully parsed structured output
+        if vector is not None and isinstance(result, (dict, list)) and result:
+            self.store.add(vector, orjson.dumps(result), guard)
+
+    def invoke(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        vector = self._embed_input(input)
+        guard = self._guard_for(input)
+        cached = self._lookup(vector, guard)
+        if cached is not None:
+            return cached
+        result = self.chain.invoke(input, config, **kwargs)
+        self._save(vector, guard, result)
+        return result
+
+    async def alookup(self, input: Dict[str, Any]) -> Tuple[Optional[Any], Optional[np.ndarray], Optional[str]]:
+        """
+        Check the cache without calling the chain, so callers can skip other work on a hit.
+        
+        Returns:
+            (cached result or None, vector, guard); pass vector and guard to `acompute` on a miss
+        """
+        vector = await self._aembed_input(input)
+        guard = self._guard_for(input)
+        return self._lookup(vector, guard), vector, guard
+
+    async def acompute(self, input: Dict[str, Any], vector: Optional[np.ndarray], guard: Optional[str], config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        """Run the wrapped chain after an `alookup` miss and cache its result."""
+        result = await self.chain.ainvoke(input, config, **kwargs)
+        self._save(vector, guard, result)
+        return result
+
+    async def ainvoke(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        cached, vector, guard = await self.alookup(input)
+        if cached is not None:
+            return cached
+        return await self.acompute(input, vector, guard, config, **kwargs)
+
+    async def astream(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[Any]:
+        vector = await self._aembed_input(input)
+        guard = self._guard_for(input)
+        cached = self._lookup(vector, guard)
+        if cached is not None:
+            yield cached
+            return
+        # JsonOutputParser yields progressively more complete partial results
+        result = None
+        async for partial in self.chain.astream(input, config, **kwargs):
+            result = partial
+            yield partial
+        self._save(vector, guard, result)
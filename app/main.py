@@ -1,28 +1,64 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse, Response
+from app.config import settings
 from app.routers import register_routers
+import gzip
+import hashlib
+import orjson
 import os
+import re
+import stat
+from functools import lru_cache
 
 
-def create_app() -> FastAPI:
-    app = FastAPI(title="Career Guidance API", version="0.1.0")
+# Parsed once at import; dict.fromkeys dedupes while keeping the configured order
+_CORS_ORIGINS: tuple[str, ...] = tuple(dict.fromkeys(
+    origin.strip() for origin in (settings.cors_origins or "*").split(",") if origin.strip()
+)) or ("*",)
 
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
 
-    # Serve static files (frontend) - MUST be before routers to avoid conflicts
+class _CORSMiddleware(CORSMiddleware):
+    """CORSMiddleware with an O(1) origin check (Starlette already pre-joins the header strings)."""
+
+    def __init__(self, app, allow_origins=(), **kwargs):
+        super().__init__(app, allow_origins=allow_origins, **kwargs)
+        self._allow_origins_set = frozenset(allow_origins)
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        if self.allow_all_origins or origin in self._allow_origins_set:
+            return True
+        return self.allow_origin_regex is not None and self.allow_origin_regex.fullmatch(origin) is not None
+
+
+# Fingerprinted build assets (e.g. app.3f9a1c2b.js) never change under the same name
+_HASHED_ASSET = re.compile(r"\.[0-9a-f]{8,}\.(?:js|css|woff2?|png|jpe?g|svg|webp)$", re.IGNORECASE)
+
+
+class _CachedStaticFiles(StaticFiles):
+    """StaticFiles that sets Cache-Control so browsers skip most repeat /static requests."""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        path = str(full_path)
+        if _HASHED_ASSET.search(path):
+            response.headers["cache-control"] = "public, max-age=31536000, immutable"
+        elif path.endswith(".html"):
+            response.headers["cache-control"] = "public, max-age=300"
+        else:
+            response.headers["cache-control"] = "public, max-age=86400"
+        return response
+
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _possible_static_dirs() -> list[str]:
     # Try multiple paths for different deployment environments (local vs Vercel serverless)
     # In Vercel, files are in /var/task/ or similar, so we need to check multiple locations
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    possible_static_dirs = [
-        os.path.join(base_dir, "static"),  # Relative to app/ directory
+    return [
+        os.path.join(_BASE_DIR, "static"),  # Relative to app/ directory
         os.path.join(os.getcwd(), "static"),  # Current working directory
         os.path.join(os.path.dirname(os.path.dirname(__file__)), "static"),  # Alternative relative path
         "static",  # Simple relative path
@@ -30,46 +66,108 @@ def create_app() -> FastAPI:
         "/var/task/static",  # Vercel serverless path
         "/var/task/api/static",  # Alternative Vercel path
     ]
-    
-    static_dir = None
-    for dir_path in possible_static_dirs:
-        if os.path.exists(dir_path) and os.path.isdir(dir_path):
-            static_dir = dir_path
-            print(f"✅ Found static directory at: {static_dir}")
-            break
-    
-    if static_dir:
-        app.mount("/static", StaticFiles(directory=static_dir), name="static")
-        
-        # Serve chat UI at root
-        @app.get("/", include_in_schema=False)
-        def read_root():
-            index_path = os.path.join(static_dir, "index.html")
-            if os.path.exists(index_path):
-                return FileResponse(index_path)
-            else:
-                print(f"⚠️ index.html not found at: {index_path}")
-                print(f"   Current working directory: {os.getcwd()}")
-                print(f"   Base directory: {base_dir}")
-                return {"service": "Career Guidance API", "chat_ui": "Visit /docs for API documentation", "note": f"index.html not found at {index_path}"}
+
+
+@lru_cache(maxsize=1)
+def _resolve_static_dir() -> str | None:
+    """Find the frontend static directory (searched once per process)."""
+    for dir_path in dict.fromkeys(_possible_static_dirs()):
+        try:
+            # One stat gives both existence and type (exists + isdir took two)
+            if stat.S_ISDIR(os.stat(dir_path).st_mode):
+                print(f"✅ Found static directory at: {dir_path}")
+                return dir_path
+        except OSError:
+            continue
+    return None
+
+
+_STATIC_DIR = _resolve_static_dir() if settings.serve_static else None
+_INDEX_PATH = os.path.join(_STATIC_DIR, "index.html") if _STATIC_DIR else None
+
+
+def _load_index() -> bytes | None:
+    """Read index.html once; it does not change for the lifetime of a deployed process."""
+    if _INDEX_PATH is None:
+        return None
+    try:
+        with open(_INDEX_PATH, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+_INDEX_BYTES = _load_index()
+_INDEX_ETAG = f'"{hashlib.blake2b(_INDEX_BYTES, digest_size=16).hexdigest()}"' if _INDEX_BYTES is not None else None
+_INDEX_HEADERS = {"ETag": _INDEX_ETAG, "Cache-Control": "public, max-age=300", "Vary": "Accept-Encoding"} if _INDEX_ETAG else {}
+
+# Compressed once per process instead of per response; mtime=0 keeps the bytes deterministic
+_INDEX_GZIP = gzip.compress(_INDEX_BYTES, compresslevel=9, mtime=0) if _INDEX_BYTES is not None else None
+_INDEX_GZIP_ETAG = f'{_INDEX_ETAG[:-1]}-gzip"' if _INDEX_ETAG else None
+_INDEX_GZIP_HEADERS = {**_INDEX_HEADERS, "ETag": _INDEX_GZIP_ETAG, "Content-Encoding": "gzip"} if _INDEX_GZIP_ETAG else {}
+
+
+# Fixed JSON bodies are encoded once; each request gets a fresh Response around the
+# shared bytes (middleware mutates response headers, so Response objects are not shared)
+_HEALTH_BODY = orjson.dumps({"status": "ok"})
+_NO_STATIC_BODY = orjson.dumps({"service": "Career Guidance API", "chat_ui": "Visit /docs for API documentation", "note": "Static files not found"})
+_NO_INDEX_BODY = orjson.dumps({"service": "Career Guidance API", "chat_ui": "Visit /docs for API documentation", "note": f"index.html not found at {_INDEX_PATH}"})
+
+
+# Handlers are async so they run on the event loop instead of the threadpool
+async def read_index(request: Request) -> Response:
+    """Serve the chat UI at root."""
+    # Served from memory: no open/stat per request, and repeat visits get a 304
+    if _INDEX_BYTES is not None:
+        if "gzip" in request.headers.get("accept-encoding", ""):
+            body, headers = _INDEX_GZIP, _INDEX_GZIP_HEADERS
+        else:
+            body, headers = _INDEX_BYTES, _INDEX_HEADERS
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="text/html", headers=headers)
+    print(f"⚠️ index.html not found at: {_INDEX_PATH}")
+    print(f"   Current working directory: {os.getcwd()}")
+    print(f"   Base directory: {_BASE_DIR}")
+    return Response(content=_NO_INDEX_BODY, media_type="application/json")
+
+
+async def read_root_without_static() -> Response:
+    return Response(content=_NO_STATIC_BODY, media_type="application/json")
+
+
+async def health_check() -> Response:
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+
+def create_app() -> FastAPI:
+    # orjson serializes responses much faster than the stdlib json encoder
+    app = FastAPI(title="Career Guidance API", version="0.1.0", default_response_class=ORJSONResponse)
+
+    app.add_middleware(
+        _CORSMiddleware,
+        allow_origins=_CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Serve static files (frontend) - MUST be before routers to avoid conflicts
+    if _STATIC_DIR:
+        app.mount("/static", _CachedStaticFiles(directory=_STATIC_DIR), name="static")
+        app.add_api_route("/", read_index, methods=["GET"], include_in_schema=False)
     else:
-        # Fallback if static directory not found
-        print(f"⚠️ Static directory not found. Checked paths: {possible_static_dirs}")
-        print(f"   Current working directory: {os.getcwd()}")
-        print(f"   Base directory: {base_dir}")
-        @app.get("/", include_in_schema=False)
-        def read_root():
-            return {"service": "Career Guidance API", "chat_ui": "Visit /docs for API documentation", "note": "Static files not found"}
+        if settings.serve_static:
+            print(f"⚠️ Static directory not found. Checked paths: {_possible_static_dirs()}")
+            print(f"   Current working directory: {os.getcwd()}")
+            print(f"   Base directory: {_BASE_DIR}")
+        app.add_api_route("/", read_root_without_static, methods=["GET"], include_in_schema=False)
     
     register_routers(app)
 
-    @app.get("/health")
-    def health_check():
-        return {"status": "ok"}
+    app.add_api_route("/health", health_check, methods=["GET"])
 
     return app
 
 
 app = create_app()
-
-
@@ -1,15 +1,28 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import List, Optional
 
 
-class ResumeParsed(BaseModel):
+class _Schema(BaseModel):
+    """Base for API and LLM schemas: immutable, strict about unknown fields, whitespace-trimmed."""
+    model_config = ConfigDict(frozen=True, extra="forbid", str_strip_whitespace=True)
+
+
+class ResumeParsed(_Schema):
     name: str
     email: EmailStr
     experience: str
     skills: List[str]
 
 
-class Profile(BaseModel):
+class ResumeExtraction(_Schema):
+    """Fields extracted from resume text; email is a plain string because resumes may omit it."""
+    name: str
+    email: str
+    experience: str
+    skills: List[str]
+
+
+class Profile(_Schema):
     user_id: str
     name: Optional[str] = None
     email: Optional[EmailStr] = None
@@ -17,32 +30,50 @@ class Profile(BaseModel):
     skills: Optional[List[str]] = None
 
 
-class GoalCreate(BaseModel):
+class GoalCreate(_Schema):
     goal_text: str
 
 
-class Goal(BaseModel):
+class Goal(_Schema):
     goal_id: str
     user_id: str
     goal_text: str
     status: str
 
 
-class SkillGapRequest(BaseModel):
+class SkillGapRequest(_Schema):
     user_skills: List[str]
     job_skills: List[str]
 
 
-class SkillGapResult(BaseModel):
+class SkillGapResult(_Schema):
     matched: List[str]
     gap: List[str]
 
 
-class JobFitRequest(BaseModel):
+class JobFitRequest(_Schema):
     profile: Profile
     job_description: str
 
 
-class JobFitResult(BaseModel):
+class JobFitResult(_Schema):
     fit_score: int
     rationale: str
+
+
+class JobFitScreenResult(_Schema):
+    required_skills: List[str]
+    matched_skills: List[str]
+    profile_domain: str
+    job_domain: str
+    domain_mismatch: bool
+    base_score: int
+
+
+class JobFitBatchRequest(_Schema):
+    profile: Profile
+    job_descriptions: List[str]
+
+
+class JobFitBatchResult(_Schema):
+    results: List[JobFitResult]
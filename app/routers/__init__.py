@@ -1,23 +1,12 @@
+from importlib import import_module
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from .root import router as root_router
-from .profiles import router as profiles_router
-from .goals import router as goals_router
-from .resume import router as resume_router
-from .analysis import router as analysis_router
-from .rag import router as rag_router
-from .reco import router as reco_router
-from .chat import router as chat_router
 
 
-def register_routers(app: FastAPI) -> None:
-    app.include_router(root_router)
-    app.include_router(profiles_router)
-    app.include_router(goals_router)
-    app.include_router(resume_router)
-    app.include_router(analysis_router)
-    app.include_router(rag_router)
-    app.include_router(reco_router)
-    app.include_router(chat_router)
+# Registration order; each module is only imported when routers are registered,
+# so importing this package does not pull in the LLM / Supabase clients
+_ROUTER_MODULES = ("root", "profiles", "goals", "resume", "analysis", "rag", "reco", "chat")
 
 
+def register_routers(app: FastAPI) -> None:
+    for name in _ROUTER_MODULES:
+        app.include_router(import_module(f".{name}", __package__).router)
@@ -1,45 +1,113 @@
 from fastapi import APIRouter, HTTPException
-from app.models.schemas import SkillGapRequest, SkillGapResult, JobFitRequest, JobFitResult
-from app.llm.chains import get_skill_gap_chain, get_job_fit_chain
-import json
+from app.models.schemas import (
+    SkillGapRequest, SkillGapResult, JobFitRequest, JobFitResult, JobFitBatchRequest, JobFitBatchResult, Profile
+)
+from app.llm.chains import get_skill_gap_chain, get_job_fit_batch_chain, ascore_job_fit
+from app.services.vector_matcher import classify_skill_gap
+from app.config import settings
+from app.utils.text_utils import literal_skill_gap
+from app.utils.json_utils import to_json
+from collections import OrderedDict
+import asyncio
+import hashlib
+import time
 
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
+# Job descriptions scored per completion in /job-fit/batch; larger requests
+# are split into chunks that run concurrently
+_JOB_FIT_BATCH_SIZE = 10
+
+# Negative cache: job-fit inputs that just failed are rejected for a short
+# while instead of re-sending the same (possibly broken) request to the LLM
+_FAILED_JOB_FIT_TTL = 30.0  # seconds
+_FAILED_JOB_FIT_MAX = 512
+_failed_job_fits: "OrderedDict[str, float]" = OrderedDict()
+
+
+def _job_fit_key(profile_json: str, job_description: str) -> str:
+    return hashlib.blake2b(f"{profile_json}\0{job_description}".encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _recently_failed(key: str) -> bool:
+    failed_at = _failed_job_fits.get(key)
+    if failed_at is None:
+        return False
+    if time.monotonic() - failed_at > _FAILED_JOB_FIT_TTL:
+        del _failed_job_fits[key]
+        return False
+    return True
+
+
+def _record_failure(key: str) -> None:
+    _failed_job_fits[key] = time.monotonic()
+    _failed_job_fits.move_to_end(key)
+    while len(_failed_job_fits) > _FAILED_JOB_FIT_MAX:
+        _failed_job_fits.popitem(last=False)
+
+
+def _clamp_score(value) -> int:
+    """Coerce an LLM fit score to an int in 0-100; non-numeric values score 0 instead of failing the request."""
+    try:
+        score = int(value)
+    except (TypeError, ValueError):
+        return 0
+    return 0 if score < 0 else 100 if score > 100 else score
+
+
+def _profile_json(profile: Profile) -> str:
+    return to_json({
+        "name": profile.name or "",
+        "email": profile.email or "",
+        "experience": profile.experience_summary or "",
+        "skills": profile.skills or []
+    })
+
 
 @router.post("/skill-gap", response_model=SkillGapResult)
 async def skill_gap(req: SkillGapRequest):
     """
     Perform semantic skill gap analysis between user skills and job requirements.
-    Uses LLM for semantic matching (not just exact keyword matching).
+    Literal (case-insensitive) matches are resolved in Python; of the remaining
+    job skills, clear-cut cases are decided by embedding similarity and the LLM
+    is only used for semantic matching when some job skill is ambiguous.
     """
+    exact, remaining = literal_skill_gap(req.user_skills, req.job_skills)
+    
+    if not remaining:
+        return SkillGapResult.model_construct(matched=exact, gap=[])
+    
+    try:
+        vector_result = await classify_skill_gap(req.user_skills, remaining)
+        if vector_result is not None:
+            return SkillGapResult.model_construct(matched=exact + vector_result["matched"], gap=vector_result["gap"])
+    except Exception as e:
+        print(f"⚠️ Vector skill gap failed, falling back to LLM: {e}")
+    
     chain = get_skill_gap_chain()
     
     try:
-        result = await chain.ainvoke({
-            "user_skills": json.dumps(req.user_skills),
-            "job_skills": json.dumps(req.job_skills)
-        })
+        # Only the unresolved job skills go to the LLM; a timeout falls back to literal matches
+        result = await asyncio.wait_for(chain.ainvoke({
+            "user_skills": to_json(req.user_skills),
+            "job_skills": to_json(remaining)
+        }), timeout=settings.llm_timeout_s)
         
         # Handle response format
         if isinstance(result, dict):
-            matched = result.get("matched", [])
+            matched = exact + [s for s in result.get("matched", []) if s not in exact]
             gap = result.get("gap", [])
         else:
-            # Fallback to basic matching if LLM fails
-            user_set = set(s.lower() for s in req.user_skills)
-            job_set = set(s.lower() for s in req.job_skills)
-            matched = sorted(list(user_set & job_set))
-            gap = sorted(list(job_set - user_set))
+            # Unparseable response: nothing beyond the literal matches is matched
+            matched = exact
+            gap = remaining
         
-        return SkillGapResult(matched=matched or [], gap=gap or [])
+        return SkillGapResult.model_construct(matched=matched or [], gap=gap or [])
     except Exception as e:
         # Fallback to basic string matching on error
-        user_set = set(s.lower() for s in req.user_skills)
-        job_set = set(s.lower() for s in req.job_skills)
-        matched = sorted(list(user_set & job_set))
-        gap = sorted(list(job_set - user_set))
-        return SkillGapResult(matched=matched, gap=gap)
+        print(f"⚠️ Skill gap LLM failed, returning literal matches only: {e}")
+        return SkillGapResult.model_construct(matched=exact, gap=remaining)
 
 
 @router.post("/job-fit", response_model=JobFitResult)
@@ -48,37 +116,85 @@ async def job_fit(req: JobFitRequest):
     Analyze job fit score (0-100) with rationale.
     Compares user profile against job description using LLM.
     """
-    chain = get_job_fit_chain()
+    profile_json = _profile_json(req.profile)
+    failure_key = _job_fit_key(profile_json, req.job_description)
+    if _recently_failed(failure_key):
+        raise HTTPException(
+            status_code=503,
+            detail="Job fit analysis for this input failed moments ago; please retry shortly"
+        )
     
     try:
-        profile_json = json.dumps({
-            "name": req.profile.name or "",
-            "email": req.profile.email or "",
-            "experience": req.profile.experience_summary or "",
-            "skills": req.profile.skills or []
-        })
-        
-        result = await chain.ainvoke({
-            "profile": profile_json,
-            "job_description": req.job_description
-        })
+        # Cheap screener first; the full analysis only runs for non-obvious cases
+        result = await asyncio.wait_for(
+            ascore_job_fit(profile_json, req.job_description),
+            timeout=settings.llm_timeout_s
+        )
         
         # Handle response format
         if isinstance(result, dict):
-            fit_score = result.get("fit_score", 0)
+            fit_score = _clamp_score(result.get("fit_score", 0))
             rationale = result.get("rationale", "Analysis completed.")
         else:
             fit_score = 0
             rationale = "Error parsing LLM response."
         
-        # Ensure fit_score is between 0-100
-        fit_score = max(0, min(100, int(fit_score)))
-        
-        return JobFitResult(fit_score=fit_score, rationale=rationale)
+        return JobFitResult.model_construct(fit_score=fit_score, rationale=rationale)
+    except asyncio.TimeoutError:
+        _record_failure(failure_key)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error analyzing job fit: timed out after {settings.llm_timeout_s:g}s"
+        )
     except Exception as e:
+        _record_failure(failure_key)
         raise HTTPException(
             status_code=500,
             detail=f"Error analyzing job fit: {str(e)}"
         )
 
 
+async def _score_job_fit_batch(profile_json: str, job_descriptions: list) -> list:
+    """Score one chunk of job descriptions with a single LLM call."""
+    chain = get_job_fit_batch_chain()
+    result = await chain.ainvoke({
+        "profile": profile_json,
+        "job_descriptions": "\n\n".join(
+            f"{i}) {job_description}" for i, job_description in enumerate(job_descriptions, 1)
+        )
+    })
+    
+    items = result.get("results", []) if isinstance(result, dict) else []
+    if len(items) != len(job_descriptions):
+        raise ValueError(f"Expected {len(job_descriptions)} job fit results, got {len(items)}")
+    
+    return [
+        JobFitResult.model_construct(
+            fit_score=_clamp_score(item.get("fit_score", 0)),
+            rationale=item.get("rationale", "Analysis completed.")
+        )
+        for item in items
+    ]
+
+
+@router.post("/job-fit/batch", response_model=JobFitBatchResult)
+async def job_fit_batch(req: JobFitBatchRequest):
+    """
+    Analyze job fit for several job descriptions against one profile.
+    Up to 10 job descriptions share a single LLM call (one system prompt,
+    one round trip); results are returned in request order.
+    """
+    profile_json = _profile_json(req.profile)
+    chunks = [
+        req.job_descriptions[start:start + _JOB_FIT_BATCH_SIZE]
+        for start in range(0, len(req.job_descriptions), _JOB_FIT_BATCH_SIZE)
+    ]
+    
+    try:
+        chunk_results = await asyncio.gather(*(_score_job_fit_batch(profile_json, chunk) for chunk in chunks))
+        return JobFitBatchResult.model_construct(results=[result for results in chunk_results for result in results])
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error analyzing job fit: {str(e)}"
+        )
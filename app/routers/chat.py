@@ -1,20 +1,30 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from app.llm.llm_client import get_openai_llm
-from app.services.rag_service import query_career_knowledge
+from typing import List, Optional, Tuple
+from app.llm.llm_client import get_openai_llm, with_prompt_cache_key, create_career_fallback_prompt, create_job_skill_extract_prompt
+from app.services.rag_service import query_career_knowledge, retrieve_career_documents, career_sources
 from app.services.intent_detector import detect_intent
 from app.services.resume_parser import parse_resume_text
-from app.llm.chains import get_career_recommendation_chain, get_skill_gap_chain, get_job_fit_chain
-from app.services.vector_matcher import generate_skill_embeddings, match_skills_semantic
+from app.llm.chains import get_career_recommendation_chain, get_skill_gap_chain, ascore_job_fit, astream_career_coach
+from app.services.vector_matcher import generate_skill_embeddings, match_skills_semantic, classify_skill_gap
 from app.clients.supabase_client import get_supabase_client
+from app.config import settings
 from app.models.schemas import Profile
-from app.utils.text_utils import strip_html_tags, clean_job_description
+from app.utils.text_utils import strip_html_tags, clean_job_description, extract_known_skills, literal_skill_gap
+from app.utils.profile_utils import get_cached_profile, cache_profile, invalidate_profile
+from app.utils.json_utils import to_json
+from app.llm.prompts import CAREER_CHAT_SYSTEM_PROMPT
 from langchain_core.prompts import ChatPromptTemplate
-import json
+from langchain_core.messages import SystemMessage
+import asyncio
+import orjson
 import re
 import html
 import base64
+import traceback
+from functools import lru_cache
+from itertools import islice
 try:
     from bs4 import BeautifulSoup
     HAS_BS4 = True
@@ -22,6 +32,248 @@ except ImportError:
     HAS_BS4 = False
 
 
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+# LLM list answers: optional markdown fences around the first JSON array
+_CODE_FENCE_RE = re.compile(r'```(?:json)?\s*')
+_JSON_ARRAY_RE = re.compile(r'\[.*?\]', re.DOTALL)
+# Gap section of an earlier skill-gap answer, most specific pattern first
+_GAP_SECTION_TAIL = r'.*?:\s*\n(.+?)(?:\n\n|\n💡|\n✅|\n📊|$)'
+_GAP_SECTION_RES = tuple(
+    re.compile(head + _GAP_SECTION_TAIL, re.DOTALL | re.IGNORECASE)
+    for head in (r'❌.*?Skills You Need to Develop', r'Skills You Need to Develop', r'Need to Develop')
+)
+_NEED_TO_DEVELOP_RE = _GAP_SECTION_RES[2]
+_SKILL_MARKDOWN_RE = re.compile(r'\*\*|__|`|^\s*[•\-\*]\s*')
+# "learn 4 major skills" / "4 skills" / "add 4": how many gap skills to turn into goals.
+# One anchored match tries each form as a lookahead over the whole message, so an
+# earlier form found anywhere still wins over a later one (as separate searches did)
+_NUM_SKILLS_PATTERNS = (
+    r'\b(?:top|major|important|key|main)\s+(\d+)\s+skills?\b',
+    r'\b(\d+)\s+(?:major|top|important|key|main)?\s*skills?\b',
+    r'\b(?:learn|set|create|add)\s+(\d+)\b',
+)
+_NUM_SKILLS_RE = re.compile('|'.join(f'(?=.*?{pattern})' for pattern in _NUM_SKILLS_PATTERNS), re.DOTALL)
+_GOAL_SKILL_IN_MESSAGE_RE = re.compile(r'(?:set\s+a\s+goal\s+to\s+)?(?:learn|master|study|improve|get\s+better\s+at|understand)\s+(.+?)(?:\.|$|,|\s+and)')
+_GOAL_SKILL_RE = re.compile(r'\b(?:learn|master|study|improve|get better at|understand)\s+(.+?)(?:\.|$)')
+_JOB_TITLE_RE = re.compile(r'(?:Java Developer|Software Engineer|Data Scientist|Product Manager|Developer|Engineer)[^:\n]*', re.IGNORECASE)
+# Sections of a job-fit rationale
+_RATIONALE_MATCHED_RE = re.compile(r'(?:Matched|Also matched)[:\s]+([^(]+?)(?:\s*\(|\s*\.|Missing|Domain|Base score|Final)', re.IGNORECASE)
+_RATIONALE_MISSING_RE = re.compile(r'Missing[:\s]+([^.]+?)(?:\.|Domain|Base score|Final)', re.IGNORECASE)
+_RATIONALE_DOMAIN_RE = re.compile(r'Domain[^:]*:\s*([^.]+?)(?:\.|Base score|Final)', re.IGNORECASE)
+_RATIONALE_GUIDANCE_RE = re.compile(r'GUIDANCE[:\s]+([^.]+?)(?:\.|$)', re.IGNORECASE)
+_LIST_SEPARATOR_RE = re.compile(r'[,;]')
+# "Required skills: Python, SQL, Scripting (Bash/Python)." line of a career_data chunk;
+# commas inside parentheses do not separate skills
+_REQUIRED_SKILLS_RE = re.compile(r'Required skills:\s*([^\n]+)', re.IGNORECASE)
+_SKILL_LIST_SEPARATOR_RE = re.compile(r',\s*(?![^()]*\))')
+_BROKEN_TAG_RE = re.compile(r'<[^>]*')
+# Below this size the precompiled regex strips chat HTML faster than building a BS4 tree
+_BS4_MIN_LENGTH = 4096
+# Failures the handlers recover from (flaky LLM output, embedding errors) only log
+# a full traceback with LOG_LEVEL=debug; unrecovered errors always do
+_TRACE_RECOVERED_ERRORS = (settings.log_level or "").lower() == "debug"
+
+
+@lru_cache(maxsize=256)
+def _message_text(content: str, separator: str = ' ') -> str:
+    """
+    Strip HTML from a conversation message (memoized: the goal_set scans revisit
+    the same history messages).
+    
+    Args:
+        content: Message content, possibly containing HTML
+        separator: Joins the text fragments between tags
+        
+    Returns:
+        Plain text of the message
+    """
+    if '<' not in content:
+        return html.unescape(content).strip()
+    if HAS_BS4 and len(content) >= _BS4_MIN_LENGTH:
+        try:
+            return BeautifulSoup(content, 'html.parser').get_text(separator=separator, strip=True)
+        except Exception:
+            pass
+    return html.unescape(_HTML_TAG_RE.sub(separator, content)).strip()
+
+
+# Phrases that mark a conversation message as a pasted job description
+_JD_KEYWORDS = (
+    'job description', 'job posting', 'skills required', 'required qualifications', 
+    'we are looking', 'we are seeking', 'experience:', 'full-time', 'part-time', 
+    'java developer', 'responsibilities', 'technical requirements', 'spring boot',
+    'microservices', 'employment type', 'role category', 'greetings from',
+    'job title:', 'venue:', 'date:', 'time:', 'experience range:', 'role:',
+    'industry type:', 'department:', 'employment type:', 'role category:',
+    'minimum qualification', 'education', 'key skills', 'preferred skills',
+    'must have', 'should have', 'good to have', 'technical and professional requirements',
+    'about the role', 'about this position', 'position summary', 'role overview',
+    'company overview', 'location:', 'salary range', 'benefits package'
+)
+# A JD naming at least this many well-known skills skips the LLM extraction call
+_LOCAL_JD_SKILLS_MIN = 5
+# Only the most recent messages are searched for a pasted job description
+_JD_HISTORY_SCAN_LIMIT = 20
+# Strong indicators accept shorter messages
+_STRONG_JD_KEYWORDS = (
+    'job description', 'job posting', 'we are looking', 'we are seeking',
+    'about the role', 'position summary', 'role overview', 'employment type'
+)
+# One C-level scan per message instead of a Python-level `in` check per keyword;
+# IGNORECASE avoids allocating a lowercased copy of every message
+_JD_SIGNAL_RE = re.compile('|'.join(map(re.escape, _JD_KEYWORDS)), re.IGNORECASE)
+_STRONG_JD_SIGNAL_RE = re.compile('|'.join(map(re.escape, _STRONG_JD_KEYWORDS)), re.IGNORECASE)
+
+# Last-resort skill extraction when the LLM call fails: skill -> phrases that imply it
+_FALLBACK_SKILL_KEYWORDS = {
+    'java': ['core java', 'java'],
+    'oop': ['oop concepts', 'object-oriented'],
+    'collections': ['collections'],
+    'multithreading': ['multithreading', 'threading'],
+    'exception handling': ['exception handling'],
+    'java 8': ['java 8', 'java 8 features'],
+    'sql': ['sql', 'database'],
+    'spring boot': ['spring boot'],
+    'microservices': ['microservices'],
+    'rest apis': ['rest api', 'rest apis', 'restful']
+}
+# Every phrase maps to each skill with a phrase inside it ("java 8 features" also implies
+# "java"), so the longest phrase found at a position is enough to credit all of them
+_FALLBACK_PHRASE_SKILLS = {
+    phrase: frozenset(skill for skill, keywords in _FALLBACK_SKILL_KEYWORDS.items() if any(k in phrase for k in keywords))
+    for keywords in _FALLBACK_SKILL_KEYWORDS.values() for phrase in keywords
+}
+# Zero-width lookahead so one scan sees overlapping phrases, longest first at each position
+_FALLBACK_SKILL_RE = re.compile(
+    '(?=(' + '|'.join(map(re.escape, sorted(_FALLBACK_PHRASE_SKILLS, key=len, reverse=True))) + '))',
+    re.IGNORECASE,
+)
+
+
+def _fallback_jd_skills(job_description: str) -> List[str]:
+    """
+    Spot well-known skills in a job description without an LLM call.
+    
+    Args:
+        job_description: Cleaned job description text
+        
+    Returns:
+        Title-cased skills found, in _FALLBACK_SKILL_KEYWORDS order
+    """
+    found = set()
+    for match in _FALLBACK_SKILL_RE.finditer(job_description):
+        found |= _FALLBACK_PHRASE_SKILLS[match.group(1).casefold()]
+    return [skill.title() for skill in _FALLBACK_SKILL_KEYWORDS if skill in found]
+
+
+def _split_matched_gap(user_skills: List[str], job_skills: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Split job skills into ones the user already has and the gap, without an LLM call.
+    A job skill counts as matched when it equals, contains or is contained in a
+    user skill (case-insensitive); user skills are lowered once up front.
+    
+    Args:
+        user_skills: Skills from the user's profile
+        job_skills: Skills extracted from the job description
+        
+    Returns:
+        (matched, gap), each in job_skills order
+    """
+    user_lower = [s.lower() for s in user_skills if s]
+    user_set = frozenset(user_lower)
+    matched, gap = [], []
+    for skill in job_skills:
+        js = skill.lower()
+        if js in user_set or any(us in js or js in us for us in user_lower):
+            matched.append(skill)
+        else:
+            gap.append(skill)
+    return matched, gap
+
+
+# Columns the chat handlers read; select("*") would also pull both embedding vectors
+_PROFILE_COLUMNS = "user_id, name, email, experience_summary, skills"
+
+
+def _required_skills_in(docs: List[dict]) -> List[str]:
+    """
+    Read the "Required skills:" list from the best-matching retrieved career document.
+    
+    Args:
+        docs: Raw documents from retrieve_career_documents, best match first
+        
+    Returns:
+        The listed skills, or [] if no document has such a line
+    """
+    for doc in docs:
+        match = _REQUIRED_SKILLS_RE.search(doc.get("content_chunk") or "")
+        if match:
+            skills = (skill.strip().rstrip('.').strip() for skill in _SKILL_LIST_SEPARATOR_RE.split(match.group(1)))
+            return list(dict.fromkeys(skill for skill in skills if skill))
+    return []
+
+
+def _cancel_task(task: Optional[asyncio.Task]) -> None:
+    """Cancel a helper task the handler no longer needs (retrieving the exception of one that already failed)."""
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()
+
+
+async def _sb_exec(query):
+    """Run a Supabase query builder in a worker thread (the client is synchronous and would block the event loop)."""
+    return await asyncio.to_thread(query.execute)
+
+
+async def _fetch_profile(sb, user_id: str, extra_columns: str = "") -> Optional[dict]:
+    """
+    Fetch a single profile row with only the columns the caller needs.
+    Found rows are cached briefly, so consecutive turns reuse them.
+    
+    Args:
+        sb: Supabase client
+        user_id: Profile user_id
+        extra_columns: Additional comma-separated columns (e.g. "skills_embeddings")
+        
+    Returns:
+        The profile row, or None if it does not exist
+    """
+    columns = f"{_PROFILE_COLUMNS}, {extra_columns}" if extra_columns else _PROFILE_COLUMNS
+    profile = get_cached_profile(user_id, columns)
+    if profile is not None:
+        return profile
+    res = await _sb_exec(sb.table("profiles").select(columns).eq("user_id", user_id).limit(1))
+    if not res.data:
+        # Misses are not cached: a resume upload must be visible on the next turn
+        return None
+    cache_profile(user_id, columns, res.data[0])
+    return res.data[0]
+
+
+@lru_cache(maxsize=1024)
+def _job_description_in(content: str) -> Optional[str]:
+    """
+    Detect whether a conversation message is a job description.
+    Memoized on the raw content: every turn re-scans the history, so each
+    earlier message is only stripped and checked once per process.
+    
+    Args:
+        content: Message content, possibly containing HTML
+        
+    Returns:
+        The message's plain text if it looks like a job description, else None
+    """
+    text = _message_text(content)
+    has_strong_jd_keywords = _STRONG_JD_SIGNAL_RE.search(text) is not None
+    is_long_enough = len(text) > 100  # Reduced from 150
+    if (has_strong_jd_keywords and len(text) > 50) or (is_long_enough and _JD_SIGNAL_RE.search(text) is not None):
+        return text
+    return None
+
+
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
@@ -42,6 +294,156 @@ class ChatResponse(BaseModel):
     sources: Optional[List[dict]] = None
 
 
+def _rag_context(docs: List[dict]) -> str:
+    """Format retrieved career chunks as the per-request context message ("" when nothing was found)."""
+    if not docs:
+        return ""
+    context = "\n\nRelevant Career Information:\n"
+    for doc in docs:
+        context += f"- {doc.get('career_title', 'Unknown')}: {(doc.get('content_chunk') or '')[:200]}...\n"
+    return context
+
+
+def _general_chat_prompt(history: Optional[List[ChatMessage]], context: str) -> ChatPromptTemplate:
+    """
+    Build the general career-chat prompt: static system prompt, the last 5 turns,
+    then the RAG context and the user's message.
+    
+    Args:
+        history: Conversation history from the request
+        context: Output of _rag_context
+        
+    Returns:
+        Prompt taking {input} (and {context} when non-empty)
+    """
+    messages = [(msg.role, msg.content) for msg in (history or [])[-5:]]
+    
+    # Keep the system prompt byte-identical across turns so OpenAI's prompt cache
+    # keeps matching it; per-request context goes in a trailing message instead
+    return ChatPromptTemplate.from_messages([
+        SystemMessage(content=CAREER_CHAT_SYSTEM_PROMPT),
+        *messages,
+        *([("system", "{context}")] if context else []),
+        ("human", "{input}")
+    ])
+
+
+# Generic terms that show up in gap sections but make poor goals
+_NON_GOAL_SKILL_KEYWORDS = (
+    'code quality', 'unit test', 'integration test', 'performance', 'optimization',
+    'software development', 'data science', 'programming', 'development',
+    'databases', 'coding standards', 'code reviews', 'unit testing', 'integration testing',
+    'performance tuning', 'service discovery', 'load balancing', 'api gateway'
+)
+# Gap skills matching these are turned into goals first
+_PRIORITY_GOAL_SKILLS = ('spring boot', 'microservices', 'rest api', 'docker', 'ci/cd', 'java 8', 'spring cloud')
+_NON_GOAL_SKILL_RE = re.compile('|'.join(map(re.escape, _NON_GOAL_SKILL_KEYWORDS)), re.IGNORECASE)
+_PRIORITY_GOAL_SKILL_RE = re.compile('|'.join(map(re.escape, _PRIORITY_GOAL_SKILLS)), re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def _gap_skills_in(content: str) -> Tuple[str, ...]:
+    """
+    Extract the "Skills You Need to Develop" list from an earlier skill gap answer.
+    Memoized on the raw content, like _job_description_in.
+    
+    Args:
+        content: Assistant message content, possibly containing HTML
+        
+    Returns:
+        Goal-worthy gap skills, priority skills first (empty if none)
+    """
+    text = _message_text(content, '\n')
+    if "Skills You Need to Develop" not in text and "❌" not in text and "need to develop" not in text.lower():
+        return ()
+    # Format: "❌ **Skills You Need to Develop:**\nSkill1, Skill2, Skill3"; most specific pattern first
+    gap_match = next(filter(None, (pattern.search(text) for pattern in _GAP_SECTION_RES)), None)
+    if not gap_match:
+        return ()
+    
+    prioritized, remaining = [], []
+    for skill in gap_match.group(1).strip().split(','):
+        # Remove any markdown formatting and extra characters
+        skill = _SKILL_MARKDOWN_RE.sub('', skill.strip()).strip()
+        if len(skill) <= 2:
+            continue
+        if _NON_GOAL_SKILL_RE.search(skill) or skill.lower() == 'testing':
+            continue
+        (prioritized if _PRIORITY_GOAL_SKILL_RE.search(skill) else remaining).append(skill)
+    return tuple(prioritized + remaining)
+
+
+def _find_gap_skills(history: List[ChatMessage]) -> List[str]:
+    """
+    Find the most recent skill gap answer in the conversation and return its gap skills.
+    
+    Args:
+        history: Conversation history, oldest first
+        
+    Returns:
+        Gap skills from the newest assistant message that has any, else []
+    """
+    for msg in reversed(history):
+        if msg.role == 'assistant':
+            skills = _gap_skills_in(msg.content)
+            if skills:
+                print(f"🔍 Extracted {len(skills)} skills from conversation: {list(skills[:10])}")
+                return list(skills)
+    return []
+
+
+@router.post("/stream")
+async def chat_stream(req: ChatRequest):
+    """
+    Stream a general career-chat answer as Server-Sent Events.
+    Same RAG context and prompt as the default /chat reply, without intent routing;
+    only retrieval runs before the stream starts (no RAG answer completion).
+    Each event carries the next raw text delta. The `end` event carries the sources
+    and `response`, the full reply after the same strip_html_tags pass /chat applies
+    (HTML cannot be stripped reliably from partial deltas).
+    """
+    if not req.message or not req.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    docs = await retrieve_career_documents(req.message, top_k=3) if req.use_rag else []
+    context = _rag_context(docs)
+    chain = _general_chat_prompt(req.conversation_history, context) | with_prompt_cache_key(get_openai_llm(temperature=0.7), "career_chat")
+    sources = career_sources(docs) if req.use_rag else None
+    
+    async def event_stream():
+        try:
+            parts = []
+            async for chunk in chain.astream({"input": req.message, "context": context}):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield f"data: {to_json({'delta': chunk.content})}\n\n"
+            yield f"event: end\ndata: {to_json({'sources': sources, 'response': strip_html_tags(''.join(parts))}, default=str)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {to_json({'detail': f'Error generating response: {str(e)}'})}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.post("/coach/stream")
+async def chat_coach_stream(req: ChatRequest):
+    """
+    Stream a career-coach answer as Server-Sent Events.
+    Each event carries the next text delta; the stream ends with an `end` event.
+    """
+    if not req.message or not req.message.strip():
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
+    
+    async def event_stream():
+        try:
+            async for delta in astream_career_coach(req.message):
+                yield f"data: {to_json({'delta': delta})}\n\n"
+            yield "event: end\ndata: {}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {to_json({'detail': f'Error generating response: {str(e)}'})}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/", response_model=ChatResponse)
 async def chat(req: ChatRequest):
     """
@@ -54,9 +456,6 @@ async def chat(req: ChatRequest):
     - Goal setting/tracking
     - RAG for career knowledge
     """
-    # Ensure re module is available (imported at module level, but ensure it's accessible)
-    import re as regex_module
-    
     # Detect user intent
     intent_result = detect_intent(req.message, req.user_id)
     intent = intent_result["intent"]
@@ -78,7 +477,7 @@ async def chat(req: ChatRequest):
                     profile_embedding = None
                     try:
                         from app.services.vector_matcher import generate_profile_embedding
-                        profile_embedding = generate_profile_embedding(
+                        profile_embedding = await generate_profile_embedding(
                             name=parsed.get("name", ""),
                             experience=parsed.get("experience", ""),
                             skills=parsed.get("skills", [])
@@ -99,10 +498,10 @@ async def chat(req: ChatRequest):
                     if profile_embedding is not None:
                         profile_data["profile_embedding"] = profile_embedding
                     
-                    result = sb.table("profiles").upsert(profile_data).execute()
+                    result = await _sb_exec(sb.table("profiles").upsert(profile_data))
+                    invalidate_profile(req.user_id)
                     print(f"✅ Profile saved successfully for user_id: {req.user_id}")
                 except Exception as e:
-                    import traceback
                     error_trace = traceback.format_exc()
                     print(f"❌ Error saving profile in chat: {str(e)}")
                     print(f"   Full traceback: {error_trace}")
@@ -137,22 +536,16 @@ Try asking: *"What careers are good for me?"*"""
             # Fetch user profile
             try:
                 print(f"🔍 Looking for profile with user_id: {req.user_id}")
-                res = sb.table("profiles").select("*").eq("user_id", req.user_id).execute()
-                print(f"   Query returned {len(res.data) if res.data else 0} row(s)")
-                if res.data:
-                    print(f"   Found profile: {res.data[0].get('name', 'Unknown')}")
-                if not res.data:
-                    # Check if any profiles exist at all
-                    all_profiles = sb.table("profiles").select("user_id").limit(5).execute()
-                    print(f"   Total profiles in DB: {len(all_profiles.data) if all_profiles.data else 0}")
-                    if all_profiles.data:
-                        print(f"   Sample user_ids: {[p.get('user_id') for p in all_profiles.data]}")
+                profile = await _fetch_profile(sb, req.user_id)
+                if profile:
+                    print(f"   Found profile: {profile.get('name', 'Unknown')}")
+                else:
+                    print(f"   No profile found")
                     return ChatResponse(
                         response="⚠️ I don't have your profile yet. Please **upload your resume** using the '📄 Upload Resume' button above so I can recommend careers based on your skills and experience.\n\n💡 Once you upload your resume, I'll save your profile and you can ask me for career recommendations!",
                         sources=None
                     )
             except Exception as e:
-                import traceback
                 error_trace = traceback.format_exc()
                 print(f"❌ Error fetching profile: {str(e)}")
                 print(f"   Full traceback: {error_trace}")
@@ -161,7 +554,6 @@ Try asking: *"What careers are good for me?"*"""
                     sources=None
                 )
             
-            profile = res.data[0]
             skills = profile.get("skills", []) or []
             experience = profile.get("experience_summary", "") or ""
             
@@ -175,7 +567,7 @@ Try asking: *"What careers are good for me?"*"""
             try:
                 chain = get_career_recommendation_chain()
                 result = await chain.ainvoke({
-                    "skills": json.dumps(skills) if isinstance(skills, list) else str(skills),
+                    "skills": to_json(skills) if isinstance(skills, list) else str(skills),
                     "experience": experience
                 })
                 
@@ -196,62 +588,14 @@ Try asking: *"What careers are good for me?"*"""
                     # If result is a string, try to parse it as JSON
                     if isinstance(result, str):
                         try:
-                            parsed = json.loads(result)
+                            parsed = orjson.loads(result)
                             if isinstance(parsed, list):
                                 careers = parsed
                             elif isinstance(parsed, dict):
                                 careers = [parsed]
                         except:
                             # If parsing fails, use LLM to generate recommendations directly
-                            prompt = ChatPromptTemplate.from_messages([
-                                ("system", """You are Career Guidance, an expert career guidance coach for the Indian job market. 
-Based on the user's skills and experience, recommend 3-5 relevant career paths for the Indian market with brief descriptions.
-
-CRITICAL RECOMMENDATION LOGIC:
-1. FIRST, analyze the user's skills to identify their primary domain:
-   - If they have ML/AI skills (Pandas, NumPy, Scikit-learn, TensorFlow, PyTorch, LangChain, Machine Learning, Deep Learning) → Prioritize Data Science, ML Engineer, AI Engineer roles
-   - If they have data skills (SQL, Statistical Modeling, Power BI, Matplotlib, Seaborn) → Prioritize Data Scientist, Data Analyst, Business Analyst roles
-   - If they have cloud/Azure skills → Prioritize Cloud Engineer, Data Engineer, MLOps roles
-   - If they have web dev skills (React, Node.js, JavaScript, HTML, CSS) → Prioritize Web Developer roles
-   - If they have Java/Spring/Microservices → Prioritize Backend/Java Developer roles
-   - If they have full-stack skills → Prioritize Full Stack Developer roles
-
-2. ONLY recommend careers that genuinely match at least 40% of the user's skills
-3. If the user has strong ML/Data Science skills, prioritize those roles first
-4. If the user has strong software engineering skills, prioritize those roles
-5. DO NOT recommend generic web development roles if the user's profile is clearly ML/AI focused
-6. DO NOT recommend ML/AI roles if the user's profile is clearly web development focused
-
-CRITICAL CONTEXT REQUIREMENTS:
-- ALL information MUST be specific to INDIA and the Indian job market
-- ALL salary information MUST be in Indian Rupees (INR) format: ₹X LPA - ₹Y LPA (e.g., ₹8 LPA - ₹15 LPA)
-- Use REALISTIC Indian IT market salary ranges (NOT just USD conversions). Typical ranges:
-  * Software Engineer: ₹6-20 LPA (entry to senior)
-  * Data Scientist: ₹8-25 LPA
-  * Machine Learning Engineer: ₹10-30 LPA
-  * Data Analyst: ₹5-15 LPA
-  * AI Engineer: ₹10-28 LPA
-  * MLOps Engineer: ₹12-30 LPA
-  * Data Engineer: ₹8-22 LPA
-  * Business Analyst: ₹6-18 LPA
-  * DevOps Engineer: ₹8-22 LPA
-  * Product Manager: ₹12-35 LPA
-  * Backend Developer: ₹6-18 LPA
-  * Frontend Developer: ₹5-16 LPA
-  * Full Stack Developer: ₹7-20 LPA
-- Use whole numbers only (no decimals like ₹124.5 LPA - use ₹12-25 LPA instead)
-- Job outlook should reflect the Indian job market trends
-- Skills and requirements should be relevant to Indian companies
-
-CRITICAL FORMATTING RULES:
-- Use MARKDOWN format ONLY (no HTML tags whatsoever)
-- Use **bold** for emphasis, *italics* for subtle emphasis
-- Use blank lines for paragraph breaks (NOT <br>)
-- Use ### for headings if needed
-- Use - or • for lists
-- NEVER use HTML tags like <br>, <small>, <b>, <i>, <style>, or any inline CSS"""),
-                                ("human", "User skills: {skills}\nUser experience: {experience}\n\nRecommend career paths for the Indian market with brief descriptions:")
-                            ])
+                            prompt = create_career_fallback_prompt()
                             chain_direct = prompt | llm
                             direct_result = await chain_direct.ainvoke({
                                 "skills": ', '.join(skills) if isinstance(skills, list) else str(skills),
@@ -266,55 +610,7 @@ CRITICAL FORMATTING RULES:
                 # Format response
                 if not careers:
                     # Fallback: use LLM directly
-                    prompt = ChatPromptTemplate.from_messages([
-                        ("system", """You are CareerCore, an expert career guidance coach for the Indian job market. 
-Based on the user's skills and experience, recommend 3-5 relevant career paths for the Indian market with brief descriptions.
-
-CRITICAL RECOMMENDATION LOGIC:
-1. FIRST, analyze the user's skills to identify their primary domain:
-   - If they have ML/AI skills (Pandas, NumPy, Scikit-learn, TensorFlow, PyTorch, LangChain, Machine Learning, Deep Learning) → Prioritize Data Science, ML Engineer, AI Engineer roles
-   - If they have data skills (SQL, Statistical Modeling, Power BI, Matplotlib, Seaborn) → Prioritize Data Scientist, Data Analyst, Business Analyst roles
-   - If they have cloud/Azure skills → Prioritize Cloud Engineer, Data Engineer, MLOps roles
-   - If they have web dev skills (React, Node.js, JavaScript, HTML, CSS) → Prioritize Web Developer roles
-   - If they have Java/Spring/Microservices → Prioritize Backend/Java Developer roles
-   - If they have full-stack skills → Prioritize Full Stack Developer roles
-
-2. ONLY recommend careers that genuinely match at least 40% of the user's skills
-3. If the user has strong ML/Data Science skills, prioritize those roles first
-4. If the user has strong software engineering skills, prioritize those roles
-5. DO NOT recommend generic web development roles if the user's profile is clearly ML/AI focused
-6. DO NOT recommend ML/AI roles if the user's profile is clearly web development focused
-
-CRITICAL CONTEXT REQUIREMENTS:
-- ALL information MUST be specific to INDIA and the Indian job market
-- ALL salary information MUST be in Indian Rupees (INR) format: ₹X LPA - ₹Y LPA (e.g., ₹8 LPA - ₹15 LPA)
-- Use REALISTIC Indian IT market salary ranges (NOT just USD conversions). Typical ranges:
-  * Software Engineer: ₹6-20 LPA (entry to senior)
-  * Data Scientist: ₹8-25 LPA
-  * Machine Learning Engineer: ₹10-30 LPA
-  * Data Analyst: ₹5-15 LPA
-  * AI Engineer: ₹10-28 LPA
-  * MLOps Engineer: ₹12-30 LPA
-  * Data Engineer: ₹8-22 LPA
-  * Business Analyst: ₹6-18 LPA
-  * DevOps Engineer: ₹8-22 LPA
-  * Product Manager: ₹12-35 LPA
-  * Backend Developer: ₹6-18 LPA
-  * Frontend Developer: ₹5-16 LPA
-  * Full Stack Developer: ₹7-20 LPA
-- Use whole numbers only (no decimals like ₹124.5 LPA - use ₹12-25 LPA instead)
-- Job outlook should reflect the Indian job market trends
-- Skills and requirements should be relevant to Indian companies
-
-CRITICAL FORMATTING RULES:
-- Use MARKDOWN format ONLY (no HTML tags whatsoever)
-- Use **bold** for emphasis, *italics* for subtle emphasis
-- Use blank lines for paragraph breaks (NOT <br>)
-- Use ### for headings if needed
-- Use - or • for lists
-- NEVER use HTML tags like <br>, <small>, <b>, <i>, <style>, or any inline CSS"""),
-                        ("human", "User skills: {skills}\nUser experience: {experience}\n\nRecommend career paths:")
-                    ])
+                    prompt = create_career_fallback_prompt()
                     chain_direct = prompt | llm
                     direct_result = await chain_direct.ainvoke({
                         "skills": ', '.join(skills) if isinstance(skills, list) else str(skills),
@@ -351,7 +647,6 @@ CRITICAL FORMATTING RULES:
                 return ChatResponse(response=response_text, sources=None)
                 
             except Exception as e:
-                import traceback
                 error_trace = traceback.format_exc()
                 # Log the full error for debugging
                 print(f"❌ Error in career recommendation: {str(e)}")
@@ -376,131 +671,88 @@ CRITICAL FORMATTING RULES:
                     sources=None
                 )
             
-            # Fetch user profile
-            res = sb.table("profiles").select("*").eq("user_id", req.user_id).execute()
-            if not res.data:
+            # Fetch user profile in a worker thread (the Supabase client is synchronous) so the
+            # round trip overlaps the history search and JD skill extraction below
+            profile_task = asyncio.create_task(_fetch_profile(sb, req.user_id, "skills_embeddings"))
+            skills_task = None
+            local_skills = []
+            try:
+                target_career = extracted_data.get("target_career", "")
+                
+                # Check if user is asking about previous job description from conversation
+                job_description = None
+                # Always try to find job description in conversation history if:
+                # 1. Target is explicitly "previous_job_description"
+                # 2. No target specified (default to previous job)
+                # 3. Message contains "missing", "what", "resume", or "cv" (likely asking about gaps)
+                should_search_history = (
+                    target_career == "previous_job_description" or 
+                    not target_career or 
+                    "missing" in req.message.lower() or 
+                    "what" in req.message.lower() or
+                    "resume" in req.message.lower() or
+                    "cv" in req.message.lower()
+                )
+                
+                if should_search_history:
+                    # Look through conversation history for the most recent job description
+                    if req.conversation_history:
+                        print(f"🔍 Searching conversation history for job description ({len(req.conversation_history)} messages)...")
+                        # Search backwards through conversation for job description
+                        for msg in islice(reversed(req.conversation_history), _JD_HISTORY_SCAN_LIMIT):
+                            msg_role, msg_content = msg.role, msg.content
+                
+                            # Check if this looks like a job description (check both user and assistant messages)
+                            found = _job_description_in(msg_content)
+                            if found:
+                                job_description = found
+                                print(f"🔍 Found job description in conversation history ({msg_role} message): {len(job_description)} chars")
+                                print(f"   Preview: {found[:200]}...")
+                                break
+                
+                if job_description:
+                    # Clean the job description text before processing
+                    job_description = clean_job_description(job_description)
+                    # Most JDs name enough well-known skills to skip the LLM round trip
+                    local_skills = extract_known_skills(job_description)
+                    if len(local_skills) < _LOCAL_JD_SKILLS_MIN:
+                        # Extract skills from job description using LLM with more detailed prompt;
+                        # started now so it runs concurrently with the profile fetch
+                        skill_extract_chain = create_job_skill_extract_prompt() | llm
+                        skills_task = asyncio.create_task(skill_extract_chain.ainvoke({"job_description": job_description}))
+                
+                profile = await profile_task
+            except BaseException:
+                # Don't leave the profile fetch or an LLM extraction running orphaned
+                _cancel_task(profile_task)
+                _cancel_task(skills_task)
+                raise
+            
+            if not profile:
+                _cancel_task(skills_task)
                 return ChatResponse(
                     response="⚠️ I don't have your profile yet. Please upload your resume first.",
                     sources=None
                 )
             
-            user_skills = res.data[0].get("skills", []) or []
-            user_skill_embeddings = res.data[0].get("skills_embeddings") or []
-            target_career = extracted_data.get("target_career", "")
-            
-            # Check if user is asking about previous job description from conversation
-            job_description = None
-            # Always try to find job description in conversation history if:
-            # 1. Target is explicitly "previous_job_description"
-            # 2. No target specified (default to previous job)
-            # 3. Message contains "missing", "what", "resume", or "cv" (likely asking about gaps)
-            should_search_history = (
-                target_career == "previous_job_description" or 
-                not target_career or 
-                "missing" in req.message.lower() or 
-                "what" in req.message.lower() or
-                "resume" in req.message.lower() or
-                "cv" in req.message.lower()
-            )
-            
-            if should_search_history:
-                # Look through conversation history for the most recent job description
-                if req.conversation_history:
-                    print(f"🔍 Searching conversation history for job description ({len(req.conversation_history)} messages)...")
-                    # Search backwards through conversation for job description
-                    for msg in reversed(req.conversation_history):
-                        # Handle different message formats
-                        if isinstance(msg, dict):
-                            msg_role = msg.get('role', 'user')
-                            msg_content = msg.get('content', '') or msg.get('message', '')
-                        elif hasattr(msg, 'content'):
-                            msg_role = getattr(msg, 'role', 'user')
-                            msg_content = msg.content
-                        else:
-                            msg_role = 'user'
-                            msg_content = str(msg)
-                        
-                        # Strip HTML tags from content
-                        try:
-                            if HAS_BS4:
-                                # Try to parse HTML and extract text
-                                soup = BeautifulSoup(msg_content, 'html.parser')
-                                msg_content = soup.get_text(separator=' ', strip=True)
-                            else:
-                                # Fallback: simple regex to remove HTML tags
-                                msg_content = regex_module.sub(r'<[^>]+>', ' ', msg_content)
-                                msg_content = html.unescape(msg_content)
-                        except:
-                            # Fallback: simple regex to remove HTML tags
-                            msg_content = regex_module.sub(r'<[^>]+>', ' ', msg_content)
-                            msg_content = html.unescape(msg_content)
-                        
-                        msg_text = msg_content.lower()
-                        
-                        # Check if this looks like a job description (check both user and assistant messages)
-                        jd_keywords = [
-                            'job description', 'job posting', 'skills required', 'required qualifications', 
-                            'we are looking', 'we are seeking', 'experience:', 'full-time', 'part-time', 
-                            'java developer', 'responsibilities', 'technical requirements', 'spring boot',
-                            'microservices', 'employment type', 'role category', 'greetings from',
-                            'job title:', 'venue:', 'date:', 'time:', 'experience range:', 'role:',
-                            'industry type:', 'department:', 'employment type:', 'role category:',
-                            'minimum qualification', 'education', 'key skills', 'preferred skills',
-                            'must have', 'should have', 'good to have', 'technical and professional requirements',
-                            'about the role', 'about this position', 'position summary', 'role overview',
-                            'company overview', 'location:', 'salary range', 'benefits package'
-                        ]
-                        # More lenient: accept shorter messages if they have strong JD indicators
-                        has_strong_jd_keywords = any(keyword in msg_text for keyword in [
-                            'job description', 'job posting', 'we are looking', 'we are seeking',
-                            'about the role', 'position summary', 'role overview', 'employment type'
-                        ])
-                        is_long_enough = len(msg_content) > 100  # Reduced from 150
-                        if (has_strong_jd_keywords and len(msg_content) > 50) or (any(keyword in msg_text for keyword in jd_keywords) and is_long_enough):
-                            job_description = msg_content
-                            print(f"🔍 Found job description in conversation history ({msg_role} message): {len(job_description)} chars")
-                            print(f"   Preview: {msg_content[:200]}...")
-                            break
+            user_skills = profile.get("skills", []) or []
+            user_skill_embeddings = profile.get("skills_embeddings") or []
             
             # Extract skills from job description or get from career name
             job_skills = []
-            if job_description:
-                # Clean the job description text before processing
-                job_description = clean_job_description(job_description)
-                # Extract skills from job description using LLM with more detailed prompt
-                skill_extract_prompt = ChatPromptTemplate.from_messages([
-                    ("system", """You are a technical recruiter extracting skills from a job description. 
-Extract ALL technical skills, programming languages, frameworks, tools, and concepts mentioned. 
-Include:
-- Programming languages (e.g., Java, Python, JavaScript)
-- Frameworks and libraries (e.g., Spring Boot, React.js, REST APIs)
-- Concepts and knowledge areas (e.g., OOP Concepts, Multithreading, Collections)
-- Database technologies (e.g., SQL, MongoDB, MySQL)
-- Security tools and technologies (e.g., Symantec DLP, SIEM, log analysis, forensic analysis, incident response)
-- Domain-specific skills (e.g., cyber security, security monitoring, vulnerability assessment, penetration testing)
-- Any specific tools, technologies, or concepts mentioned
-
-CRITICAL: For Cyber Security roles, extract security-specific skills like:
-- Security tools: Symantec DLP, SIEM tools, security monitoring tools
-- Security processes: log analysis, forensic analysis, incident response, vulnerability assessment
-- Security knowledge: cyber security, information security, security operations, risk analysis
-
-Return ONLY a JSON array of skills as strings. Be comprehensive and include all mentioned skills.
-Example for Cyber Security: ["Symantec DLP", "log analysis", "forensic analysis", "incident response", "cyber security", "security monitoring", "vulnerability assessment", "risk analysis", "security operations"]
-Example for Web Dev: ["Core Java", "OOP Concepts", "Collections", "Multithreading", "SQL", "Spring Boot", "Microservices", "REST APIs", "React.js", "HTML5", "CSS3"]"""),
-                    ("human", "Job Description:\n{job_description}\n\nExtract all skills and return as JSON array:")
-                ])
-                skill_extract_chain = skill_extract_prompt | llm
+            if job_description and skills_task is None:
+                job_skills = local_skills
+                print(f"🔍 Extracted {len(job_skills)} skills locally (LLM extraction skipped): {job_skills}")
+            elif job_description:
                 try:
-                    skills_result = await skill_extract_chain.ainvoke({"job_description": job_description})
+                    skills_result = await skills_task
                     skills_text = skills_result.content if hasattr(skills_result, 'content') else str(skills_result)
                     # Try to extract JSON array
                     # Remove markdown code blocks if present
-                    skills_text = regex_module.sub(r'```json\s*', '', skills_text)
-                    skills_text = regex_module.sub(r'```\s*', '', skills_text)
-                    skills_match = regex_module.search(r'\[.*?\]', skills_text, regex_module.DOTALL)
+                    skills_text = _CODE_FENCE_RE.sub('', skills_text)
+                    skills_match = _JSON_ARRAY_RE.search(skills_text)
                     if skills_match:
-                        job_skills = json.loads(skills_match.group(0))
+                        job_skills = orjson.loads(skills_match.group(0))
                         print(f"🔍 Extracted {len(job_skills)} skills from job description: {job_skills}")
                     else:
                         # Fallback: try to parse as comma-separated list
@@ -513,64 +765,47 @@ Example for Web Dev: ["Core Java", "OOP Concepts", "Collections", "Multithreadin
                         raise ValueError("No skills extracted from job description")
                 except Exception as e:
                     print(f"⚠️ Error extracting skills from job description: {e}")
-                    import traceback
-                    print(f"   Traceback: {traceback.format_exc()}")
+                    if _TRACE_RECOVERED_ERRORS:
+                        print(f"   Traceback: {traceback.format_exc()}")
                     # Fallback: use LLM to get skills from career name
                     if target_career and target_career != "previous_job_description":
-                        career_query = f"required skills for {target_career}"
-                        career_info = await query_career_knowledge(career_query, top_k=2)
                         job_skills = ["Python", "SQL", "Statistics", "Machine Learning"]  # Default fallback
                     else:
                         # Try to extract skills manually from job description text
-                        jd_lower = job_description.lower()
-                        common_skills = []
-                        skill_keywords = {
-                            'java': ['core java', 'java'],
-                            'oop': ['oop concepts', 'object-oriented'],
-                            'collections': ['collections'],
-                            'multithreading': ['multithreading', 'threading'],
-                            'exception handling': ['exception handling'],
-                            'java 8': ['java 8', 'java 8 features'],
-                            'sql': ['sql', 'database'],
-                            'spring boot': ['spring boot'],
-                            'microservices': ['microservices'],
-                            'rest apis': ['rest api', 'rest apis', 'restful']
-                        }
-                        for skill_name, keywords in skill_keywords.items():
-                            if any(kw in jd_lower for kw in keywords):
-                                common_skills.append(skill_name.title())
+                        common_skills = _fallback_jd_skills(job_description)
                         if common_skills:
                             job_skills = common_skills
                             print(f"🔍 Fallback: Manually extracted {len(job_skills)} skills: {job_skills}")
             elif target_career and target_career != "previous_job_description":
-                # Get required skills for target career from RAG
-                career_query = f"required skills for {target_career}"
-                career_info = await query_career_knowledge(career_query, top_k=2)
+                # Ask the LLM for the career's skills while RAG runs; its answer is only
+                # used (and otherwise cancelled) if the knowledge base has nothing relevant
+                skill_prompt = ChatPromptTemplate.from_messages([
+                    ("system", "List the top 5-10 required skills for the given career. Return as JSON array: ['skill1', 'skill2']"),
+                    ("human", "Career: {career}")
+                ])
+                skills_task = asyncio.create_task((skill_prompt | llm).ainvoke({"career": target_career}))
                 
-                # Extract job skills from career data or use LLM
-                if career_info.get("sources"):
-                    # Try to extract skills from career data
-                    for source in career_info["sources"]:
-                        content = source.get("content_chunk", "")
-                        # Look for skills mentioned
-                        if "Required skills" in content or "Skills" in content:
-                            # Basic extraction (could be improved)
-                            job_skills.extend(["Python", "SQL", "Statistics", "Machine Learning"])  # Placeholder
+                # Get required skills for target career from the knowledge base (retrieval only:
+                # the chunks' "Required skills:" lines are read directly, no RAG answer is generated)
+                career_query = f"required skills for {target_career}"
+                try:
+                    job_skills = _required_skills_in(await retrieve_career_documents(career_query, top_k=2))
+                except BaseException:
+                    _cancel_task(skills_task)
+                    raise
                 
                 # Use LLM to get required skills if not found
-                if not job_skills:
-                    skill_prompt = ChatPromptTemplate.from_messages([
-                        ("system", "List the top 5-10 required skills for the given career. Return as JSON array: ['skill1', 'skill2']"),
-                        ("human", "Career: {career}")
-                    ])
-                    skill_chain = skill_prompt | llm
+                if job_skills:
+                    _cancel_task(skills_task)
+                    print(f"🔍 Using {len(job_skills)} required skills from the knowledge base: {job_skills}")
+                else:
                     try:
-                        skills_result = await skill_chain.ainvoke({"career": target_career})
+                        skills_result = await skills_task
                         skills_text = skills_result.content if hasattr(skills_result, 'content') else str(skills_result)
                         # Try to extract JSON array
-                        skills_match = regex_module.search(r'\[.*?\]', skills_text)
+                        skills_match = _JSON_ARRAY_RE.search(skills_text)
                         if skills_match:
-                            job_skills = json.loads(skills_match.group(0))
+                            job_skills = orjson.loads(skills_match.group(0))
                     except:
                         job_skills = ["Python", "SQL", "Statistics", "Machine Learning", "Data Analysis"]  # Default
             # Check if we have job skills to analyze
@@ -598,7 +833,7 @@ Example for Web Dev: ["Core Java", "OOP Concepts", "Collections", "Multithreadin
             if user_skill_embeddings and job_skills:
                 try:
                     # Generate embeddings for job skills
-                    job_skill_embeddings = generate_skill_embeddings(job_skills)
+                    job_skill_embeddings = await generate_skill_embeddings(job_skills)
                     print(f"✅ Generated {len(job_skill_embeddings)} job skill embeddings")
                     
                     # Match skills using vector similarity
@@ -622,52 +857,51 @@ Example for Web Dev: ["Core Java", "OOP Concepts", "Collections", "Multithreadin
                     
                 except Exception as e:
                     print(f"⚠️ Error in vector skill matching: {e}")
-                    import traceback
-                    print(f"   Traceback: {traceback.format_exc()}")
+                    if _TRACE_RECOVERED_ERRORS:
+                        print(f"   Traceback: {traceback.format_exc()}")
                     # Fall through to LLM analysis
             
             # Fall back to LLM analysis if vector matching wasn't used or failed
             if not use_vector_matching:
+                # Literal matches are settled here; the LLM only sees what is left
+                exact, remaining = literal_skill_gap(user_skills, job_skills)
                 try:
-                    # Perform skill gap analysis using LLM
-                    chain = get_skill_gap_chain()
-                    gap_result = await chain.ainvoke({
-                        "user_skills": json.dumps(user_skills),
-                        "job_skills": json.dumps(job_skills)
-                    })
-                    
-                    print(f"🔍 Gap analysis result: {gap_result}")
+                    if not remaining:
+                        gap_result = {"matched": [], "gap": []}
+                        print(f"✅ All {len(exact)} job skills matched literally, skipping LLM gap analysis")
+                    else:
+                        # Perform skill gap analysis using LLM
+                        chain = get_skill_gap_chain()
+                        gap_result = await chain.ainvoke({
+                            "user_skills": to_json(user_skills),
+                            "job_skills": to_json(remaining)
+                        })
+                        print(f"🔍 Gap analysis result: {gap_result}")
                     
                     if isinstance(gap_result, dict):
-                        matched = gap_result.get("matched", []) or []
+                        matched = exact + [s for s in gap_result.get("matched", []) or [] if s not in exact]
                         gap = gap_result.get("gap", []) or []
-                        # If gap is empty but we have job skills, something went wrong
-                        if not gap and job_skills:
+                        # If gap is empty but skills were left to classify, something went wrong
+                        if not gap and remaining:
                             # Fallback: manually compute gap
-                            user_skills_lower = [s.lower() for s in user_skills]
-                            gap = [js for js in job_skills if js.lower() not in user_skills_lower and not any(us.lower() in js.lower() or js.lower() in us.lower() for us in user_skills)]
+                            gap = _split_matched_gap(user_skills, remaining)[1]
                             print(f"⚠️ Gap was empty, computed manually: {gap}")
                     else:
                         # Fallback: manual computation
-                        user_skills_lower = [s.lower() for s in user_skills]
-                        matched = [js for js in job_skills if js.lower() in user_skills_lower or any(us.lower() in js.lower() or js.lower() in us.lower() for us in user_skills)]
-                        gap = [js for js in job_skills if js.lower() not in user_skills_lower and not any(us.lower() in js.lower() or js.lower() in us.lower() for us in user_skills)]
+                        matched, gap = _split_matched_gap(user_skills, job_skills)
                         print(f"⚠️ Gap result was not dict, computed manually. Matched: {len(matched)}, Gap: {len(gap)}")
                 except Exception as e:
-                    import traceback
-                    error_trace = traceback.format_exc()
                     print(f"⚠️ Error in skill gap chain: {e}")
-                    print(f"   Traceback: {error_trace}")
+                    if _TRACE_RECOVERED_ERRORS:
+                        print(f"   Traceback: {traceback.format_exc()}")
                     # Fallback: manual computation
-                    user_skills_lower = [s.lower() for s in user_skills]
-                    matched = [js for js in job_skills if js.lower() in user_skills_lower or any(us.lower() in js.lower() or js.lower() in us.lower() for us in user_skills)]
-                    gap = [js for js in job_skills if js.lower() not in user_skills_lower and not any(us.lower() in js.lower() or js.lower() in us.lower() for us in user_skills)]
+                    matched, gap = _split_matched_gap(user_skills, job_skills)
                     print(f"⚠️ Using manual computation. Matched: {len(matched)}, Gap: {len(gap)}")
             
             # Determine title for response
             if job_description:
                 # Try to extract job title from job description
-                title_match = regex_module.search(r'(?:Java Developer|Software Engineer|Data Scientist|Product Manager|Developer|Engineer)[^:\n]*', job_description, regex_module.IGNORECASE)
+                title_match = _JOB_TITLE_RE.search(job_description)
                 job_title = title_match.group(0).strip() if title_match else "the Job"
                 analysis_title = f"Skill Gap Analysis for {job_title}"
             elif target_career and target_career != "previous_job_description":
@@ -675,10 +909,12 @@ Example for Web Dev: ["Core Java", "OOP Concepts", "Collections", "Multithreadin
             else:
                 analysis_title = "Skill Gap Analysis for the Job"
             
-            # Format response safely
-            matched_str = ', '.join(str(s) for s in matched) if matched else 'None found'
-            gap_str = ', '.join(str(s) for s in gap) if gap else 'None! You have all the required skills.'
-            recommendation_str = ', '.join(str(s) for s in gap[:3]) if gap else 'You\'re well-prepared!'
+            # Format response safely (LLM lists may hold non-strings; coerce once)
+            matched = list(map(str, matched))
+            gap = list(map(str, gap))
+            matched_str = ', '.join(matched) if matched else 'None found'
+            gap_str = ', '.join(gap) if gap else 'None! You have all the required skills.'
+            recommendation_str = ', '.join(gap[:3]) if gap else 'You\'re well-prepared!'
             
             response_text = f"""📊 **{analysis_title}**
 
@@ -702,47 +938,44 @@ Focus on developing: {recommendation_str}"""
                 )
             
             # Fetch user profile by user_id
-            res = sb.table("profiles").select("*").eq("user_id", req.user_id).execute()
+            profile = await _fetch_profile(sb, req.user_id, "profile_embedding")
             
             # If not found by user_id, try to find by checking if user_id is email-based
             # and look for profiles with matching email (in case user_id changed after resume upload)
-            if not res.data:
+            if not profile:
                 print(f"⚠️ Profile not found for user_id: {req.user_id}, checking if profile exists with different user_id...")
                 # Try to extract email from user_id if it's email-based
                 # Email-based user_ids are like: user_YW1iYWRpZ293dGhhbUBn
                 # Try to decode the base64 part
                 try:
+                    decoded_email = None
                     if req.user_id.startswith('user_'):
-                        # Extract the base64 part
-                        base64_part = req.user_id[5:]  # Remove 'user_' prefix
-                        # Try to decode (this is reverse of btoa)
-                        # Add padding if needed
-                        padding = 4 - len(base64_part) % 4
-                        if padding != 4:
-                            base64_part += '=' * padding
+                        # Reverse of btoa; surplus '=' padding is ignored by the decoder,
+                        # so no padding arithmetic is needed
                         try:
-                            decoded_email = base64.b64decode(base64_part).decode('utf-8')
+                            decoded_email = base64.b64decode(req.user_id.removeprefix('user_') + '===').decode('utf-8')
                             print(f"🔍 Decoded email from user_id: {decoded_email}")
-                            # Try to find profile by email
-                            email_res = sb.table("profiles").select("*").eq("email", decoded_email).execute()
-                            if email_res.data and len(email_res.data) > 0:
-                                # Found profile by email, update it to use the new user_id
-                                print(f"✅ Found profile by email, updating user_id from {email_res.data[0].get('user_id')} to {req.user_id}")
-                                sb.table("profiles").update({"user_id": req.user_id}).eq("email", decoded_email).execute()
-                                # Fetch again with new user_id
-                                res = sb.table("profiles").select("*").eq("user_id", req.user_id).execute()
                         except Exception as decode_error:
                             print(f"⚠️ Could not decode email from user_id: {decode_error}")
+                    if decoded_email:
+                        # Try to find profile by email
+                        email_res = await _sb_exec(sb.table("profiles").select("user_id").eq("email", decoded_email).limit(1))
+                        if email_res.data:
+                            # Found profile by email, update it to use the new user_id
+                            print(f"✅ Found profile by email, updating user_id from {email_res.data[0].get('user_id')} to {req.user_id}")
+                            await _sb_exec(sb.table("profiles").update({"user_id": req.user_id}).eq("email", decoded_email))
+                            invalidate_profile(req.user_id)
+                            # Fetch again with new user_id
+                            profile = await _fetch_profile(sb, req.user_id, "profile_embedding")
                 except Exception as e:
                     print(f"⚠️ Error checking for profile by email: {e}")
             
-            if not res.data:
+            if not profile:
                 return ChatResponse(
                     response="⚠️ I don't have your profile yet. Please upload your resume first.",
                     sources=None
                 )
             
-            profile = res.data[0]
             job_description = extracted_data.get("job_description", req.message)
             
             # Clean and normalize job description text
@@ -764,7 +997,7 @@ Focus on developing: {recommendation_str}"""
                 try:
                     from app.services.vector_matcher import calculate_profile_similarity, generate_job_embedding
                     # Generate job embedding
-                    job_embedding = generate_job_embedding(job_description)
+                    job_embedding = await generate_job_embedding(job_description)
                     # Calculate vector similarity (0-1 scale)
                     vector_similarity = calculate_profile_similarity(user_embedding, job_embedding)
                     vector_score = vector_similarity * 100  # Convert to 0-100 scale
@@ -774,17 +1007,16 @@ Focus on developing: {recommendation_str}"""
                     # Fallback to LLM-only
                     vector_score = None
             
-            # Get LLM analysis
-            chain = get_job_fit_chain()
-            fit_result = await chain.ainvoke({
-                "profile": json.dumps({
+            # Get LLM analysis (screened first, full analysis only when needed)
+            fit_result = await ascore_job_fit(
+                to_json({
                     "name": profile_obj.name or "",
                     "email": profile_obj.email or "",
                     "experience": profile_obj.experience_summary or "",
                     "skills": profile_obj.skills or []
                 }),
-                "job_description": job_description
-            })
+                job_description
+            )
             
             if isinstance(fit_result, dict):
                 llm_score = fit_result.get("fit_score", 0)
@@ -834,10 +1066,10 @@ Focus on developing: {recommendation_str}"""
             
             # Extract all matched skills (including "Matched:" and "Also matched:")
             # Pattern to find all "Matched:" or "Also matched:" sections
-            matched_sections = re.findall(r'(?:Matched|Also matched)[:\s]+([^(]+?)(?:\s*\(|\s*\.|Missing|Domain|Base score|Final)', rationale, re.IGNORECASE)
+            matched_sections = _RATIONALE_MATCHED_RE.findall(rationale)
             for section in matched_sections:
                 # Clean and split skills from each section
-                skills = [s.strip() for s in re.split(r'[,;]', section) if s.strip() and not s.strip().startswith('(')]
+                skills = [s.strip() for s in _LIST_SEPARATOR_RE.split(section) if s.strip() and not s.strip().startswith('(')]
                 matched_skills.extend(skills)
             
             # Remove duplicates while preserving order
@@ -845,13 +1077,13 @@ Focus on developing: {recommendation_str}"""
             matched_skills = [s for s in matched_skills if s not in seen and not seen.add(s)]
             
             # Extract missing skills (look for "Missing:" pattern)
-            missing_match = re.search(r'Missing[:\s]+([^.]+?)(?:\.|Domain|Base score|Final)', rationale, re.IGNORECASE)
+            missing_match = _RATIONALE_MISSING_RE.search(rationale)
             if missing_match:
                 missing_text = missing_match.group(1)
-                missing_skills = [s.strip() for s in re.split(r'[,;]', missing_text) if s.strip()]
+                missing_skills = [s.strip() for s in _LIST_SEPARATOR_RE.split(missing_text) if s.strip()]
             
             # Extract domain alignment info
-            domain_match = re.search(r'Domain[^:]*:\s*([^.]+?)(?:\.|Base score|Final)', rationale, re.IGNORECASE)
+            domain_match = _RATIONALE_DOMAIN_RE.search(rationale)
             if domain_match:
                 domain_info = domain_match.group(1).strip()
             
@@ -887,7 +1119,7 @@ Focus on developing: {recommendation_str}"""
                 response_parts.append("")
             
             # Extract actionable guidance from rationale
-            guidance_match = re.search(r'GUIDANCE[:\s]+([^.]+?)(?:\.|$)', rationale, re.IGNORECASE)
+            guidance_match = _RATIONALE_GUIDANCE_RE.search(rationale)
             guidance_text = guidance_match.group(1).strip() if guidance_match else None
             
             # Add insights with actionable guidance
@@ -943,14 +1175,10 @@ Focus on developing: {recommendation_str}"""
                 # Check if user wants to learn N skills (e.g., "learn 4 major skills", "set goals to learn 4", "add top 4 skills")
                 num_skills_to_learn = None
                 # Check for number in the original message - multiple patterns
-                num_match = regex_module.search(r'\b(?:top|major|important|key|main)\s+(\d+)\s+skills?\b', req.message.lower())
-                if not num_match:
-                    num_match = regex_module.search(r'\b(\d+)\s+(?:major|top|important|key|main)?\s*skills?\b', req.message.lower())
-                if not num_match:
-                    # Also check for "learn 4" or "4 skills" anywhere in message
-                    num_match = regex_module.search(r'\b(?:learn|set|create|add)\s+(\d+)\b', req.message.lower())
+                message_lower = req.message.lower()
+                num_match = _NUM_SKILLS_RE.match(message_lower)
                 if num_match:
-                    num_skills_to_learn = int(num_match.group(1))
+                    num_skills_to_learn = int(next(filter(None, num_match.groups())))
                     print(f"🔍 User requested {num_skills_to_learn} skills")
                 
                 # Check if goal_text is "from_context" - need to extract from conversation history
@@ -998,87 +1226,7 @@ Focus on developing: {recommendation_str}"""
                     skills_to_learn = []
                     if req.conversation_history:
                         print(f"🔍 Searching conversation history for skill gap analysis ({len(req.conversation_history)} messages)...")
-                        # Search backwards for skill gap analysis response
-                        for msg in reversed(req.conversation_history):
-                            # Check if this is an assistant message with skill gap info
-                            # Handle both dict and Pydantic model formats
-                            if isinstance(msg, dict):
-                                msg_role = msg.get('role', '')
-                                msg_content = msg.get('content', '') or msg.get('message', '')
-                            elif hasattr(msg, 'role') or hasattr(msg, 'content'):
-                                msg_role = getattr(msg, 'role', '')
-                                msg_content = getattr(msg, 'content', '') or getattr(msg, 'message', '')
-                            else:
-                                msg_role = ''
-                                msg_content = str(msg)
-                            
-                            if msg_role == 'assistant':
-                                
-                                # Strip HTML tags from content
-                                try:
-                                    if HAS_BS4:
-                                        # Try to parse HTML and extract text
-                                        soup = BeautifulSoup(msg_content, 'html.parser')
-                                        msg_content_clean = soup.get_text(separator='\n', strip=True)
-                                    else:
-                                        # Fallback: simple regex to remove HTML tags
-                                        msg_content_clean = regex_module.sub(r'<[^>]+>', '\n', msg_content)
-                                        msg_content_clean = html.unescape(msg_content_clean)
-                                except:
-                                    # Fallback: simple regex to remove HTML tags
-                                    msg_content_clean = regex_module.sub(r'<[^>]+>', '\n', msg_content)
-                                    msg_content_clean = html.unescape(msg_content_clean)
-                                
-                                # Look for "Skills You Need to Develop" section
-                                if "Skills You Need to Develop" in msg_content_clean or "❌" in msg_content_clean or "need to develop" in msg_content_clean.lower():
-                                    print(f"🔍 Found potential skill gap message, extracting skills...")
-                                    # Extract skills from the gap section
-                                    # Format: "❌ **Skills You Need to Develop:**\nSkill1, Skill2, Skill3"
-                                    # Try multiple patterns (use cleaned content without HTML)
-                                    gap_match = regex_module.search(r'❌.*?Skills You Need to Develop.*?:\s*\n(.+?)(?:\n\n|\n💡|\n✅|\n📊|$)', msg_content_clean, regex_module.DOTALL | regex_module.IGNORECASE)
-                                    if not gap_match:
-                                        # Alternative pattern without emoji
-                                        gap_match = regex_module.search(r'Skills You Need to Develop.*?:\s*\n(.+?)(?:\n\n|\n💡|\n✅|\n📊|$)', msg_content_clean, regex_module.DOTALL | regex_module.IGNORECASE)
-                                    if not gap_match:
-                                        # Pattern for "Need to Develop" without "Skills You"
-                                        gap_match = regex_module.search(r'Need to Develop.*?:\s*\n(.+?)(?:\n\n|\n💡|\n✅|\n📊|$)', msg_content_clean, regex_module.DOTALL | regex_module.IGNORECASE)
-                                    
-                                    if gap_match:
-                                        skills_text = gap_match.group(1).strip()
-                                        # Split by comma and clean up
-                                        skills_to_learn = [s.strip() for s in skills_text.split(',') if s.strip()]
-                                        # Remove any markdown formatting and extra characters
-                                        skills_to_learn = [regex_module.sub(r'\*\*|__|`|^\s*[•\-\*]\s*', '', s).strip() for s in skills_to_learn]
-                                        # Filter out empty strings and non-skill items
-                                        skills_to_learn = [s for s in skills_to_learn if s and len(s) > 2]
-                                        # Filter out non-technical skills and generic terms
-                                        non_skill_keywords = [
-                                            'code quality', 'unit test', 'integration test', 'performance', 'optimization',
-                                            'software development', 'data science', 'programming', 'development',
-                                            'databases', 'coding standards', 'code reviews', 'unit testing', 'integration testing',
-                                            'performance tuning', 'service discovery', 'load balancing', 'api gateway'
-                                        ]
-                                        skills_to_learn = [s for s in skills_to_learn if not any(nsk in s.lower() for nsk in non_skill_keywords)]
-                                        
-                                        # Also filter out standalone testing terms
-                                        skills_to_learn = [s for s in skills_to_learn if not s.lower().strip() in ['unit testing', 'integration testing', 'testing']]
-                                        
-                                        # Prioritize important skills (frameworks, major concepts)
-                                        priority_skills = ['spring boot', 'microservices', 'rest api', 'docker', 'ci/cd', 'java 8', 'spring cloud']
-                                        prioritized = []
-                                        remaining = []
-                                        for skill in skills_to_learn:
-                                            skill_lower = skill.lower()
-                                            if any(ps in skill_lower for ps in priority_skills):
-                                                prioritized.append(skill)
-                                            else:
-                                                remaining.append(skill)
-                                        # Combine: prioritized first, then others
-                                        skills_to_learn = prioritized + remaining
-                                        
-                                        if skills_to_learn:
-                                            print(f"🔍 Extracted {len(skills_to_learn)} skills from conversation: {skills_to_learn[:10]}")
-                                            break
+                        skills_to_learn = _find_gap_skills(req.conversation_history)
                     
                     # If no skills found in history, try to extract from the current message using LLM
                     if not skills_to_learn:
@@ -1090,7 +1238,7 @@ Focus on developing: {recommendation_str}"""
                         
                         # Build conversation context
                         conv_text = "\n".join([
-                            f"{msg.get('role', 'user') if isinstance(msg, dict) else getattr(msg, 'role', 'user')}: {msg.get('content', '') if isinstance(msg, dict) else (getattr(msg, 'content', '') or getattr(msg, 'message', ''))}"
+                            f"{msg.role}: {msg.content}"
                             for msg in (req.conversation_history[-5:] if req.conversation_history else [])
                         ])
                         
@@ -1102,57 +1250,21 @@ Focus on developing: {recommendation_str}"""
                             })
                             context_text = context_result.content if hasattr(context_result, 'content') else str(context_result)
                             # Try to extract JSON array
-                            skills_match = regex_module.search(r'\[.*?\]', context_text)
+                            skills_match = _JSON_ARRAY_RE.search(context_text)
                             if skills_match:
-                                skills_to_learn = json.loads(skills_match.group(0))
+                                skills_to_learn = orjson.loads(skills_match.group(0))
                         except Exception as e:
                             print(f"⚠️ Error extracting skills from context: {e}")
                     
                     if not skills_to_learn:
-                        # Try one more time - search for any skill gap analysis in the last few messages
-                        if req.conversation_history:
-                            for msg in reversed(req.conversation_history[-5:]):
-                                if isinstance(msg, dict):
-                                    msg_content = msg.get('content', '') or msg.get('message', '')
-                                elif hasattr(msg, 'content'):
-                                    msg_content = getattr(msg, 'content', '') or getattr(msg, 'message', '')
-                                else:
-                                    msg_content = str(msg)
-                                
-                                # Strip HTML
-                                try:
-                                    if HAS_BS4:
-                                        soup = BeautifulSoup(msg_content, 'html.parser')
-                                        msg_content_clean = soup.get_text(separator='\n', strip=True)
-                                    else:
-                                        msg_content_clean = regex_module.sub(r'<[^>]+>', '\n', msg_content)
-                                        msg_content_clean = html.unescape(msg_content_clean)
-                                except:
-                                    msg_content_clean = regex_module.sub(r'<[^>]+>', '\n', msg_content)
-                                    msg_content_clean = html.unescape(msg_content_clean)
-                                
-                                # Look for "Skills You Need to Develop" or similar
-                                if "Need to Develop:" in msg_content_clean or "❌" in msg_content_clean:
-                                    # Extract everything after "Need to Develop:"
-                                    gap_match = regex_module.search(r'Need to Develop.*?:\s*\n(.+?)(?:\n\n|\n💡|\n✅|\n📊|$)', msg_content_clean, regex_module.DOTALL | regex_module.IGNORECASE)
-                                    if gap_match:
-                                        skills_text = gap_match.group(1).strip()
-                                        skills_to_learn = [s.strip() for s in skills_text.split(',') if s.strip()]
-                                        skills_to_learn = [regex_module.sub(r'\*\*|__|`|^\s*[•\-\*]\s*', '', s).strip() for s in skills_to_learn]
-                                        skills_to_learn = [s for s in skills_to_learn if s and len(s) > 2]
-                                        if skills_to_learn:
-                                            print(f"🔍 Found skills in recent message: {skills_to_learn}")
-                                            break
-                        
-                        if not skills_to_learn:
-                            return ChatResponse(
-                                response="⚠️ I couldn't find any skills to set goals for in our conversation.\n\n" +
-                                        "💡 **Try saying:**\n" +
-                                        "• \"Set a goal to learn Spring Boot\"\n" +
-                                        "• \"Help me set a goal to master Microservices\"\n" +
-                                        "• Or ask for skill gap analysis first, then say \"Add the skills to goals\" or \"Set goals for them\"",
-                                sources=None
-                            )
+                        return ChatResponse(
+                            response="⚠️ I couldn't find any skills to set goals for in our conversation.\n\n" +
+                                    "💡 **Try saying:**\n" +
+                                    "• \"Set a goal to learn Spring Boot\"\n" +
+                                    "• \"Help me set a goal to master Microservices\"\n" +
+                                    "• Or ask for skill gap analysis first, then say \"Add the skills to goals\" or \"Set goals for them\"",
+                            sources=None
+                        )
                     
                     # Limit number of skills based on user request or default
                     max_skills = num_skills_to_learn if num_skills_to_learn else min(5, len(skills_to_learn))
@@ -1171,18 +1283,17 @@ Focus on developing: {recommendation_str}"""
                     user_id_clean = req.user_id.strip()
                     
                     # CRITICAL: Ensure profile exists before creating goals (foreign key constraint)
-                    profile_check = sb.table("profiles").select("user_id").eq("user_id", user_id_clean).execute()
-                    if not profile_check.data or len(profile_check.data) == 0:
+                    if not await _fetch_profile(sb, user_id_clean):
                         # Profile doesn't exist, create a minimal profile
                         print(f"⚠️ Profile not found for user_id: {user_id_clean}, creating minimal profile...")
                         try:
-                            sb.table("profiles").upsert({
+                            await _sb_exec(sb.table("profiles").upsert({
                                 "user_id": user_id_clean,
                                 "name": "",
                                 "email": "",
                                 "experience_summary": "",
                                 "skills": []
-                            }).execute()
+                            }))
                             print(f"✅ Created minimal profile for user_id: {user_id_clean}")
                         except Exception as e:
                             print(f"❌ Error creating profile: {str(e)}")
@@ -1192,7 +1303,7 @@ Focus on developing: {recommendation_str}"""
                             )
                     
                     # Fetch existing goals for this user to prevent duplicates
-                    existing_goals_res = sb.table("goals").select("*").eq("user_id", user_id_clean).execute()
+                    existing_goals_res = await _sb_exec(sb.table("goals").select("*").eq("user_id", user_id_clean))
                     existing_goals = existing_goals_res.data or []
                     existing_goal_texts = {g.get("goal_text", "").lower().strip() for g in existing_goals}
                     
@@ -1223,7 +1334,7 @@ Focus on developing: {recommendation_str}"""
                                     # Reactivate if completed
                                     try:
                                         goal_id = existing_goal.get("goal_id")
-                                        update_res = sb.table("goals").update({"status": "active"}).eq("goal_id", goal_id).eq("user_id", user_id_clean).execute()
+                                        update_res = await _sb_exec(sb.table("goals").update({"status": "active"}).eq("goal_id", goal_id).eq("user_id", user_id_clean))
                                         reactivated_goals.append(skill.strip())
                                         print(f"🔄 Reactivated goal: {goal_text_clean}")
                                     except Exception as e:
@@ -1233,19 +1344,18 @@ Focus on developing: {recommendation_str}"""
                         
                         # Create new goal
                         try:
-                            res = sb.table("goals").insert({
+                            res = await _sb_exec(sb.table("goals").insert({
                                 "user_id": user_id_clean,
                                 "goal_text": goal_text_clean,
                                 "status": "active"
-                            }).execute()
+                            }))
                             created_goals.append(skill.strip())
                             print(f"✅ Created goal: {goal_text_clean} for user_id: {user_id_clean}")
                         except Exception as e:
-                            import traceback
-                            error_trace = traceback.format_exc()
                             error_msg = f"Error creating goal for '{skill}': {str(e)}"
                             print(f"⚠️ {error_msg}")
-                            print(f"   Traceback: {error_trace}")
+                            if _TRACE_RECOVERED_ERRORS:
+                                print(f"   Traceback: {traceback.format_exc()}")
                             errors.append(error_msg)
                     
                     # Build response message
@@ -1300,12 +1410,12 @@ These goals are already active:
                     if not goal_text_clean_for_extraction or len(goal_text_clean_for_extraction) < 2:
                         # Try extracting directly from the user's message
                         message_lower = req.message.lower()
-                        skill_match = regex_module.search(r'(?:set\s+a\s+goal\s+to\s+)?(?:learn|master|study|improve|get\s+better\s+at|understand)\s+(.+?)(?:\.|$|,|\s+and)', message_lower)
+                        skill_match = _GOAL_SKILL_IN_MESSAGE_RE.search(message_lower)
                         if skill_match:
                             goal_text_clean_for_extraction = skill_match.group(1).strip()
                     
                     # Pattern to extract skill name after "learn", "master", "study", etc.
-                    skill_match = regex_module.search(r'\b(?:learn|master|study|improve|get better at|understand)\s+(.+?)(?:\.|$)', goal_text_clean_for_extraction.lower())
+                    skill_match = _GOAL_SKILL_RE.search(goal_text_clean_for_extraction.lower())
                     if skill_match:
                         extracted_skill = skill_match.group(1).strip()
                     else:
@@ -1341,18 +1451,17 @@ These goals are already active:
                 goal_text_lower = goal_text_clean.lower()
                 
                 # CRITICAL: Ensure profile exists before creating goal (foreign key constraint)
-                profile_check = sb.table("profiles").select("user_id").eq("user_id", user_id_clean).execute()
-                if not profile_check.data or len(profile_check.data) == 0:
+                if not await _fetch_profile(sb, user_id_clean):
                     # Profile doesn't exist, create a minimal profile
                     print(f"⚠️ Profile not found for user_id: {user_id_clean}, creating minimal profile...")
                     try:
-                        sb.table("profiles").upsert({
+                        await _sb_exec(sb.table("profiles").upsert({
                             "user_id": user_id_clean,
                             "name": "",
                             "email": "",
                             "experience_summary": "",
                             "skills": []
-                        }).execute()
+                        }))
                         print(f"✅ Created minimal profile for user_id: {user_id_clean}")
                     except Exception as e:
                         print(f"❌ Error creating profile: {str(e)}")
@@ -1362,7 +1471,7 @@ These goals are already active:
                         )
                 
                 # Check if goal already exists for this user
-                existing_goals_res = sb.table("goals").select("*").eq("user_id", user_id_clean).execute()
+                existing_goals_res = await _sb_exec(sb.table("goals").select("*").eq("user_id", user_id_clean))
                 existing_goals = existing_goals_res.data or []
                 existing_goal = next((g for g in existing_goals if g.get("goal_text", "").lower().strip() == goal_text_lower), None)
                 
@@ -1377,7 +1486,7 @@ This goal is already active. Ask me *"What are my goals?"* to see all your activ
                     elif existing_goal.get("status") == "completed":
                         # Reactivate the goal
                         goal_id = existing_goal.get("goal_id")
-                        update_res = sb.table("goals").update({"status": "active"}).eq("goal_id", goal_id).eq("user_id", user_id_clean).execute()
+                        update_res = await _sb_exec(sb.table("goals").update({"status": "active"}).eq("goal_id", goal_id).eq("user_id", user_id_clean))
                         response_text = f"""🔄 **Goal Reactivated!**
 
 🎯 **Your Goal:**
@@ -1393,11 +1502,11 @@ This goal was previously completed and is now active again. Ask me *"What are my
 This goal already exists. Ask me *"What are my goals?"* to see all your goals."""
                 else:
                     # Create new goal
-                    res = sb.table("goals").insert({
+                    res = await _sb_exec(sb.table("goals").insert({
                         "user_id": user_id_clean,
                         "goal_text": goal_text_clean,
                         "status": "active"
-                    }).execute()
+                    }))
                     
                     print(f"✅ Created goal: {goal_text_clean} for user_id: {user_id_clean}")
                     
@@ -1411,7 +1520,6 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
                 return ChatResponse(response=response_text, sources=None)
                 
             except Exception as e:
-                import traceback
                 error_trace = traceback.format_exc()
                 print(f"❌ Error in goal_set endpoint: {str(e)}")
                 print(f"   Full traceback:\n{error_trace}")
@@ -1436,7 +1544,7 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
             user_id_clean = req.user_id.strip()
             print(f"🔍 Fetching goals for user_id: {user_id_clean}")
             
-            res = sb.table("goals").select("*").eq("user_id", user_id_clean).order("created_at", desc=True).execute()
+            res = await _sb_exec(sb.table("goals").select("*").eq("user_id", user_id_clean).order("created_at", desc=True))
             goals = res.data or []
             
             print(f"📋 Found {len(goals)} goals for user_id: {user_id_clean}")
@@ -1498,7 +1606,7 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
             
             try:
                 # Get all active goals - explicitly filter by user_id to prevent cross-user data access
-                res = sb.table("goals").select("*").eq("user_id", user_id_clean).eq("status", "active").order("created_at", desc=True).execute()
+                res = await _sb_exec(sb.table("goals").select("*").eq("user_id", user_id_clean).eq("status", "active").order("created_at", desc=True))
                 active_goals = res.data or []
                 
                 print(f"📋 Found {len(active_goals)} active goals for user_id: {user_id_clean}")
@@ -1556,24 +1664,10 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
                 # If no specific goal found, check conversation history for most recently mentioned goal
                 if not goal_to_complete and req.conversation_history:
                     for msg in reversed(req.conversation_history[-10:]):
-                        if isinstance(msg, dict):
-                            msg_content = msg.get('content', '') or msg.get('message', '')
-                        elif hasattr(msg, 'content'):
-                            msg_content = getattr(msg, 'content', '')
-                        else:
-                            msg_content = str(msg)
+                        msg_content = msg.content
                         
                         # Strip HTML
-                        try:
-                            if HAS_BS4:
-                                soup = BeautifulSoup(msg_content, 'html.parser')
-                                msg_content = soup.get_text(separator=' ', strip=True)
-                            else:
-                                msg_content = regex_module.sub(r'<[^>]+>', ' ', msg_content)
-                                msg_content = html.unescape(msg_content)
-                        except:
-                            msg_content = regex_module.sub(r'<[^>]+>', ' ', msg_content)
-                            msg_content = html.unescape(msg_content)
+                        msg_content = _message_text(msg_content)
                         
                         msg_lower = msg_content.lower()
                         # Look for goal mentions
@@ -1594,7 +1688,7 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
                 # Update goal status to completed - CRITICAL: Ensure user_id filter is applied
                 goal_id = goal_to_complete.get("goal_id")
                 user_id_clean = req.user_id.strip()
-                update_res = sb.table("goals").update({"status": "completed"}).eq("goal_id", goal_id).eq("user_id", user_id_clean).execute()
+                update_res = await _sb_exec(sb.table("goals").update({"status": "completed"}).eq("goal_id", goal_id).eq("user_id", user_id_clean))
                 print(f"✅ Marked goal '{goal_to_complete.get('goal_text', 'Unknown')}' as completed for user_id: {user_id_clean}")
                 
                 if update_res.data:
@@ -1612,7 +1706,6 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
                 return ChatResponse(response=response_text, sources=None)
                 
             except Exception as e:
-                import traceback
                 error_trace = traceback.format_exc()
                 print(f"❌ Error marking goal as completed: {str(e)}")
                 print(f"   Full traceback:\n{error_trace}")
@@ -1630,14 +1723,13 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
                 )
             
             try:
-                res = sb.table("profiles").select("*").eq("user_id", req.user_id).execute()
-                if not res.data:
+                profile = await _fetch_profile(sb, req.user_id)
+                if not profile:
                     return ChatResponse(
                         response="⚠️ I don't have your profile yet. Please **upload your resume** using the '📄 Upload Resume' button above.",
                         sources=None
                     )
                 
-                profile = res.data[0]
                 name = profile.get("name", "Unknown")
                 email = profile.get("email", "Not provided")
                 experience = profile.get("experience_summary", "Not provided")
@@ -1672,14 +1764,13 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
                 )
             
             try:
-                res = sb.table("profiles").select("*").eq("user_id", req.user_id).execute()
-                if not res.data:
+                profile = await _fetch_profile(sb, req.user_id)
+                if not profile:
                     return ChatResponse(
                         response="⚠️ I don't have your profile yet. Please **upload your resume** using the '📄 Upload Resume' button above.",
                         sources=None
                     )
                 
-                profile = res.data[0]
                 skills = profile.get("skills", []) or []
                 
                 if skills:
@@ -1706,7 +1797,6 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
             
             # CRITICAL: Final HTML stripping pass (defense in depth)
             # Even though rag_service.py should have cleaned it, ensure no HTML remains
-            import html as html_module
             
             original_response = response_text
             
@@ -1719,8 +1809,8 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
                 print(f"   Original: {original_response[:100]}...")
                 print(f"   Current: {response_text[:100]}...")
                 # Last resort: remove everything between < and >
-                response_text = regex_module.sub(r'<[^>]+>', '', response_text)
-                response_text = regex_module.sub(r'<[^>]*', '', response_text)  # Catch broken tags
+                response_text = _HTML_TAG_RE.sub('', response_text)
+                response_text = _BROKEN_TAG_RE.sub('', response_text)  # Catch broken tags
                 response_text = response_text.strip()
             
             return ChatResponse(response=response_text, sources=sources)
@@ -1729,104 +1819,61 @@ This goal already exists. Ask me *"What are my goals?"* to see all your goals.""
             # Default: General chat with RAG
             # Check if this might be a skill gap question that wasn't detected
             message_lower = req.message.lower()
+            profile = None
             if ('missing' in message_lower or 'skills' in message_lower) and ('resume' in message_lower or 'cv' in message_lower):
                 # Try to route to skill gap analysis
                 if req.user_id:
                     try:
-                        res = sb.table("profiles").select("*").eq("user_id", req.user_id).execute()
-                        if res.data:
+                        profile = await _fetch_profile(sb, req.user_id)
+                        if profile:
                             # User has profile, try skill gap analysis
-                            user_skills = res.data[0].get("skills", []) or []
+                            user_skills = profile.get("skills", []) or []
                             # Search for job description in conversation
                             job_description = None
                             if req.conversation_history:
-                                for msg in reversed(req.conversation_history):
-                                    if isinstance(msg, dict):
-                                        msg_role = msg.get('role', 'user')
-                                        msg_content = msg.get('content', '') or msg.get('message', '')
-                                    elif hasattr(msg, 'role'):
-                                        msg_role = getattr(msg, 'role', 'user')
-                                        msg_content = getattr(msg, 'content', '') or getattr(msg, 'message', '')
-                                    else:
-                                        msg_role = 'user'
-                                        msg_content = str(msg)
-                                    
-                                    # Strip HTML
-                                    try:
-                                        if HAS_BS4:
-                                            soup = BeautifulSoup(msg_content, 'html.parser')
-                                            msg_content = soup.get_text(separator=' ', strip=True)
-                                        else:
-                                            msg_content = regex_module.sub(r'<[^>]+>', ' ', msg_content)
-                                            msg_content = html.unescape(msg_content)
-                                    except:
-                                        msg_content = regex_module.sub(r'<[^>]+>', ' ', msg_content)
-                                        msg_content = html.unescape(msg_content)
-                                    
-                                    msg_text = msg_content.lower()
-                                    jd_keywords = [
-                                        'job description', 'job posting', 'skills required', 'required qualifications', 
-                                        'we are looking', 'we are seeking', 'experience:', 'full-time', 'part-time', 
-                                        'java developer', 'responsibilities', 'technical requirements', 'spring boot',
-                                        'microservices', 'employment type', 'role category', 'greetings from',
-                                        'job title:', 'venue:', 'date:', 'time:', 'experience range:', 'role:',
-                                        'industry type:', 'department:', 'employment type:', 'role category:',
-                                        'minimum qualification', 'education', 'key skills', 'preferred skills',
-                                        'must have', 'should have', 'good to have', 'technical and professional requirements',
-                                        'about the role', 'about this position', 'position summary', 'role overview',
-                                        'company overview', 'location:', 'salary range', 'benefits package'
-                                    ]
-                                    # More lenient: accept shorter messages if they have strong JD indicators
-                                    has_strong_jd_keywords = any(keyword in msg_text for keyword in [
-                                        'job description', 'job posting', 'we are looking', 'we are seeking',
-                                        'about the role', 'position summary', 'role overview', 'employment type'
-                                    ])
-                                    is_long_enough = len(msg_content) > 100  # Reduced from 150
-                                    if (has_strong_jd_keywords and len(msg_content) > 50) or (any(keyword in msg_text for keyword in jd_keywords) and is_long_enough):
-                                        job_description = msg_content
+                                for msg in islice(reversed(req.conversation_history), _JD_HISTORY_SCAN_LIMIT):
+                                    found = _job_description_in(msg.content)
+                                    if found:
                                         # Clean the job description text
-                                        job_description = clean_job_description(job_description)
+                                        job_description = clean_job_description(found)
                                         break
                             
                             if job_description:
                                 # Extract skills and perform gap analysis
-                                skill_extract_prompt = ChatPromptTemplate.from_messages([
-                                    ("system", """You are a technical recruiter extracting skills from a job description. 
-Extract ALL technical skills, programming languages, frameworks, tools, and concepts mentioned. 
-Return ONLY a JSON array of skills as strings."""),
-                                    ("human", "Job Description:\n{job_description}\n\nExtract all skills and return as JSON array:")
-                                ])
+                                skill_extract_prompt = create_job_skill_extract_prompt()
                                 skill_extract_chain = skill_extract_prompt | llm
                                 skills_result = await skill_extract_chain.ainvoke({"job_description": job_description})
                                 skills_text = skills_result.content if hasattr(skills_result, 'content') else str(skills_result)
-                                skills_text = regex_module.sub(r'```json\s*', '', skills_text)
-                                skills_text = regex_module.sub(r'```\s*', '', skills_text)
-                                skills_match = regex_module.search(r'\[.*?\]', skills_text, regex_module.DOTALL)
+                                skills_text = _CODE_FENCE_RE.sub('', skills_text)
+                                skills_match = _JSON_ARRAY_RE.search(skills_text)
                                 if skills_match:
-                                    job_skills = json.loads(skills_match.group(0))
+                                    job_skills = orjson.loads(skills_match.group(0))
                                     
-                                    # Perform gap analysis
-                                    chain = get_skill_gap_chain()
-                                    gap_result = await chain.ainvoke({
-                                        "user_skills": json.dumps(user_skills),
-                                        "job_skills": json.dumps(job_skills)
-                                    })
+                                    # Perform gap analysis: literal matches first, then the vector
+                                    # match, and the LLM only when that is ambiguous
+                                    exact, remaining = literal_skill_gap(user_skills, job_skills)
+                                    gap_result = {"matched": [], "gap": []}
+                                    if remaining:
+                                        gap_result = await classify_skill_gap(user_skills, remaining)
+                                        if gap_result is None:
+                                            chain = get_skill_gap_chain()
+                                            gap_result = await chain.ainvoke({
+                                                "user_skills": to_json(user_skills),
+                                                "job_skills": to_json(remaining)
+                                            })
                                     
                                     # Initialize variables
                                     matched = []
                                     gap = []
                                     
                                     if isinstance(gap_result, dict):
-                                        matched = gap_result.get("matched", [])
+                                        matched = exact + [s for s in gap_result.get("matched", []) if s not in exact]
                                         gap = gap_result.get("gap", [])
-                                        if not gap and job_skills:
-                                            user_skills_lower = [s.lower() for s in user_skills]
-                                            gap = [js for js in job_skills if js.lower() not in user_skills_lower and not any(us.lower() in js.lower() or js.lower() in us.lower() for us in user_skills)]
+                                        if not gap and remaining:
+                                            gap = _split_matched_gap(user_skills, remaining)[1]
                                     else:
                                         # Fallback: manual computation
-                                        user_skills_lower = [s.lower() for s in user_skills]
-                                        matched = [js for js in job_skills if js.lower() in user_skills_lower or any(us.lower() in js.lower() or js.lower() in us.lower() for us in user_skills)]
-                                        gap = [js for js in job_skills if js.lower() not in user_skills_lower and not any(us.lower() in js.lower() or js.lower() in us.lower() for us in user_skills)]
+                                        matched, gap = _split_matched_gap(user_skills, job_skills)
                                     
                                     # Format response
                                     response_text = f"📊 **Skill Gap Analysis for the Job**\n\n"
@@ -1848,10 +1895,9 @@ Return ONLY a JSON array of skills as strings."""),
                                     sources=None
                                 )
                     except Exception as e:
-                        import traceback
-                        error_trace = traceback.format_exc()
                         print(f"⚠️ Error in fallback skill gap: {e}")
-                        print(f"   Traceback: {error_trace}")
+                        if _TRACE_RECOVERED_ERRORS:
+                            print(f"   Traceback: {traceback.format_exc()}")
                         # Continue to default handler
             
             # Check if message is asking for career recommendations based on profile/skills
@@ -1871,15 +1917,16 @@ Return ONLY a JSON array of skills as strings."""),
                 
                 # Check if profile exists and has data
                 try:
-                    res = sb.table("profiles").select("*").eq("user_id", req.user_id).execute()
-                    if not res.data:
+                    # Reuse the row fetched by the skill-gap check above when it ran
+                    if profile is None:
+                        profile = await _fetch_profile(sb, req.user_id)
+                    if not profile:
                         return ChatResponse(
                             response="⚠️ I don't have your profile yet. Please **upload your resume** using the '📄 Upload Resume' button above so I can recommend careers based on your skills and experience.\n\n💡 Once you upload your resume, I'll save your profile and you can ask me for career recommendations!",
                             sources=None
                         )
                     
                     # Check if profile has skills or experience
-                    profile = res.data[0]
                     skills = profile.get("skills", []) or []
                     experience = profile.get("experience_summary", "") or ""
                     
@@ -1895,58 +1942,12 @@ Return ONLY a JSON array of skills as strings."""),
                         sources=None
                     )
             
-            rag_result = await query_career_knowledge(req.message, top_k=3) if req.use_rag else {"answer": "", "sources": []}
-            
-            # Build conversation context
-            context = ""
-            if rag_result.get("sources"):
-                context = "\n\nRelevant Career Information:\n"
-                for source in rag_result["sources"]:
-                    context += f"- {source.get('career_title', 'Unknown')}: {source.get('content_chunk', '')[:200]}...\n"
-            
-            # Build conversation history
-            messages = []
-            if req.conversation_history:
-                for msg in req.conversation_history[-5:]:
-                    # Handle both dict and Pydantic model formats
-                    if isinstance(msg, dict):
-                        msg_role = msg.get('role', 'user')
-                        msg_content = msg.get('content', '')
-                    elif hasattr(msg, 'role'):
-                        msg_role = getattr(msg, 'role', 'user')
-                        msg_content = getattr(msg, 'content', '')
-                    else:
-                        msg_role = 'user'
-                        msg_content = str(msg)
-                    messages.append((msg_role, msg_content))
-            
-            system_prompt = """You are 'Career Guidance', an expert AI Career Guidance Coach. 
-Your tone is professional, encouraging, supportive, and data-driven. 
-You are a partner in the user's career journey. 
-Do not make up information. If you do not know an answer, say so. 
-Ground your answers in the context provided.
-
-CRITICAL FORMATTING RULES:
-- Use MARKDOWN format ONLY (no HTML tags whatsoever)
-- Use **bold** for emphasis, *italics* for subtle emphasis
-- Use blank lines for paragraph breaks (NOT <br>)
-- Use ### for headings if needed
-- Use - or • for lists
-- NEVER use HTML tags like <br>, <small>, <b>, <i>, <style>, or any inline CSS
-- NEVER include sources, citations, or references in your answer
-- Just provide the answer in clean Markdown format"""
-            
-            if context:
-                system_prompt += f"\n\n{context}"
-            
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_prompt),
-                *messages,
-                ("human", "{input}")
-            ])
-            
-            chain = prompt | llm
-            response = await chain.ainvoke({"input": req.message})
+            # Retrieval only: this reply is generated below, so a RAG answer would be discarded
+            docs = await retrieve_career_documents(req.message, top_k=3) if req.use_rag else []
+            
+            context = _rag_context(docs)
+            chain = _general_chat_prompt(req.conversation_history, context) | with_prompt_cache_key(llm, "career_chat")
+            response = await chain.ainvoke({"input": req.message, "context": context})
             answer = response.content if hasattr(response, 'content') else str(response)
             
             # CRITICAL: Strip ALL HTML tags from response - return plain text only!
@@ -1957,11 +1958,10 @@ CRITICAL FORMATTING RULES:
             
             return ChatResponse(
                 response=answer,
-                sources=rag_result.get("sources") if req.use_rag else None
+                sources=career_sources(docs) if req.use_rag else None
             )
             
     except Exception as e:
-        import traceback
         error_trace = traceback.format_exc()
         # Log the full error for debugging
         print(f"❌ Unhandled error in chat endpoint: {str(e)}")
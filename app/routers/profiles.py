@@ -1,19 +1,22 @@
 from fastapi import APIRouter
+import asyncio
 from app.clients.supabase_client import get_supabase_client
 from app.models.schemas import Profile, ResumeParsed
-from app.services.vector_matcher import generate_profile_embedding, generate_skill_embeddings
-from app.utils.profile_utils import format_skill_embeddings_for_postgres
+from app.services.vector_matcher import generate_profile_and_skill_embeddings
+from app.utils.profile_utils import format_skill_embeddings_for_postgres, invalidate_profile
 
 
 router = APIRouter(prefix="/profiles", tags=["profiles"])
 
 
 @router.post("/upsert", response_model=Profile)
-def upsert_profile(user_id: str, parsed: ResumeParsed):
+async def upsert_profile(user_id: str, parsed: ResumeParsed):
     sb = get_supabase_client()
     
+    # The Supabase client is synchronous; its calls run in worker threads so the
+    # async route does not block the event loop
     # Check if profile exists to determine if we need to regenerate embedding
-    existing_profile = sb.table("profiles").select("*").eq("user_id", user_id).execute()
+    existing_profile = await asyncio.to_thread(sb.table("profiles").select("*").eq("user_id", user_id).execute)
     
     # Check if profile data changed (optimization: only regenerate if changed)
     needs_embedding_regeneration = True
@@ -25,45 +28,42 @@ def upsert_profile(user_id: str, parsed: ResumeParsed):
             # Data hasn't changed, keep existing embedding if it exists
             needs_embedding_regeneration = False
     
-    # Generate profile embedding if needed
+    # Generate profile and skill embeddings (concurrently) if needed
     profile_embedding = None
+    skills_embeddings = None
     if needs_embedding_regeneration:
-        try:
-            profile_embedding = generate_profile_embedding(
-                name=parsed.name or "",
-                experience=parsed.experience or "",
-                skills=parsed.skills or []
-            )
-            print(f"✅ Generated profile embedding for user_id: {user_id}")
-        except Exception as e:
-            print(f"⚠️ Error generating profile embedding: {e}")
+        skills_list = parsed.skills or []
+        profile_result, skills_result = await generate_profile_and_skill_embeddings(
+            name=parsed.name or "",
+            experience=parsed.experience or "",
+            skills=skills_list
+        )
+        
+        if isinstance(profile_result, Exception):
+            print(f"⚠️ Error generating profile embedding: {profile_result}")
             # Continue without embedding - profile will be saved without it
             # If existing profile has embedding, we'll keep it (don't set to None)
             if existing_profile.data and existing_profile.data[0].get("profile_embedding"):
                 profile_embedding = existing_profile.data[0].get("profile_embedding")
-    else:
-        # Keep existing embedding if data hasn't changed
-        if existing_profile.data and existing_profile.data[0].get("profile_embedding"):
-            profile_embedding = existing_profile.data[0].get("profile_embedding")
-    
-    # Generate skill embeddings if needed
-    skills_embeddings = None
-    if needs_embedding_regeneration:
-        skills_list = parsed.skills or []
+        else:
+            profile_embedding = profile_result
+            print(f"✅ Generated profile embedding for user_id: {user_id}")
+        
         if skills_list:
-            try:
-                skills_embeddings = generate_skill_embeddings(skills_list)
-                # Format embeddings for PostgreSQL vector array
-                skills_embeddings = format_skill_embeddings_for_postgres(skills_embeddings)
-                print(f"✅ Generated {len(skills_embeddings) if skills_embeddings else 0} skill embeddings for user_id: {user_id}")
-            except Exception as e:
-                print(f"⚠️ Error generating skill embeddings: {e}")
+            if isinstance(skills_result, Exception):
+                print(f"⚠️ Error generating skill embeddings: {skills_result}")
                 # Continue without skill embeddings - profile will be saved without them
                 # If existing profile has skill embeddings, we'll keep them
                 if existing_profile.data and existing_profile.data[0].get("skills_embeddings"):
                     skills_embeddings = existing_profile.data[0].get("skills_embeddings")
+            else:
+                # Format embeddings for PostgreSQL vector array
+                skills_embeddings = format_skill_embeddings_for_postgres(skills_result)
+                print(f"✅ Generated {len(skills_embeddings) if skills_embeddings else 0} skill embeddings for user_id: {user_id}")
     else:
-        # Keep existing skill embeddings if data hasn't changed
+        # Keep existing embeddings if data hasn't changed
+        if existing_profile.data and existing_profile.data[0].get("profile_embedding"):
+            profile_embedding = existing_profile.data[0].get("profile_embedding")
         if existing_profile.data and existing_profile.data[0].get("skills_embeddings"):
             skills_embeddings = existing_profile.data[0].get("skills_embeddings")
     
@@ -80,24 +80,25 @@ def upsert_profile(user_id: str, parsed: ResumeParsed):
     if profile_embedding is not None:
         profile_data["profile_embedding"] = profile_embedding
     
-    res = (
+    res = await asyncio.to_thread(
         sb.table("profiles")
         .upsert(profile_data)
-        .execute()
+        .execute
     )
     
     # Update skills_embeddings via RPC if we have them (vector arrays need special handling)
     if skills_embeddings is not None:
         try:
             # Pass Python list directly - Supabase converts to JSONB automatically
-            sb.rpc('update_skills_embeddings', {
+            await asyncio.to_thread(sb.rpc('update_skills_embeddings', {
                 'p_user_id': user_id,
                 'p_skills_embeddings': skills_embeddings  # Pass list directly, not json.dumps()
-            }).execute()
+            }).execute)
             print(f"✅ Updated skills_embeddings via RPC for user_id: {user_id}")
         except Exception as e:
             print(f"⚠️ Error updating skills_embeddings via RPC: {e}")
             # Continue - profile is saved, just without skill embeddings
+    invalidate_profile(user_id)
     data = res.data[0]
     return Profile(
         user_id=data["user_id"],
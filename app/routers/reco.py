@@ -1,47 +1,66 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.clients.supabase_client import get_supabase_client
-from app.llm.chains import get_career_recommendation_chain
-import json
+from app.llm.chains import get_career_recommendation_chain, astream_career_recommendation
+from app.utils.json_utils import to_json
+from app.utils.profile_utils import get_cached_profile, cache_profile
 
 
 router = APIRouter(prefix="/recommend", tags=["recommend"])
 
+# Only the columns the recommendation prompt uses
+_RECO_PROFILE_COLUMNS = "skills, experience_summary"
 
-@router.get("/careers")
-async def recommend_careers(user_id: str):
-    """
-    Recommend career paths based on user's profile (skills and experience).
-    """
-    sb = get_supabase_client()
-    
-    # Fetch user profile
-    res = sb.table("profiles").select("*").eq("user_id", user_id).execute()
-    
-    if not res.data or len(res.data) == 0:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Profile not found for user_id: {user_id}. Please parse your resume first."
+
+async def _load_profile_for_recommendation(user_id: str) -> tuple[list, str]:
+    """Fetch skills and experience for user_id, raising HTTPException if unusable."""
+    profile = get_cached_profile(user_id, _RECO_PROFILE_COLUMNS)
+    if profile is None:
+        sb = get_supabase_client()
+
+        # Fetch user profile; supabase-py is synchronous, so run it in a worker thread
+        res = await asyncio.to_thread(
+            sb.table("profiles").select(_RECO_PROFILE_COLUMNS).eq("user_id", user_id).limit(1).execute
         )
-    
-    profile = res.data[0]
+
+        if not res.data or len(res.data) == 0:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Profile not found for user_id: {user_id}. Please parse your resume first."
+            )
+
+        profile = res.data[0]
+        cache_profile(user_id, _RECO_PROFILE_COLUMNS, profile)
+
     skills = profile.get("skills", []) or []
     experience = profile.get("experience_summary", "") or ""
-    
+
     if not skills and not experience:
         raise HTTPException(
             status_code=400,
             detail="Profile has no skills or experience. Please parse your resume first."
         )
-    
+
+    return skills, experience
+
+
+@router.get("/careers")
+async def recommend_careers(user_id: str):
+    """
+    Recommend career paths based on user's profile (skills and experience).
+    """
+    skills, experience = await _load_profile_for_recommendation(user_id)
+
     # Get career recommendation chain
     chain = get_career_recommendation_chain()
-    
+
     try:
         result = await chain.ainvoke({
-            "skills": json.dumps(skills) if isinstance(skills, list) else str(skills),
+            "skills": to_json(skills) if isinstance(skills, list) else str(skills),
             "experience": experience
         })
-        
+
         # Handle different response formats
         if isinstance(result, dict) and "careers" in result:
             careers = result["careers"]
@@ -49,7 +68,7 @@ async def recommend_careers(user_id: str):
             careers = result
         else:
             careers = [result] if result else []
-        
+
         return {"careers": careers}
     except Exception as e:
         raise HTTPException(
@@ -58,3 +77,22 @@ async def recommend_careers(user_id: str):
         )
 
 
+@router.get("/careers/stream")
+async def recommend_careers_stream(user_id: str):
+    """
+    Stream career recommendations as Server-Sent Events.
+    Each event carries the partially parsed career list generated so far;
+    the final event is the complete list, followed by an `end` event.
+    """
+    skills, experience = await _load_profile_for_recommendation(user_id)
+
+    async def event_stream():
+        try:
+            async for partial in astream_career_recommendation(skills, experience):
+                careers = partial.get("careers", partial) if isinstance(partial, dict) else partial
+                yield f"data: {to_json({'careers': careers})}\n\n"
+            yield "event: end\ndata: {}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {to_json({'detail': f'Error generating career recommendations: {str(e)}'})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
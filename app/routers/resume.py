@@ -1,4 +1,5 @@
 import os
+import asyncio
 import base64
 import tempfile
 import time
@@ -8,8 +9,8 @@ from typing import Optional
 from app.models.schemas import ResumeParsed
 from app.services.resume_parser import parse_resume_text, parse_resume_file
 from app.clients.supabase_client import get_supabase_client
-from app.services.vector_matcher import generate_profile_embedding, generate_skill_embeddings
-from app.utils.profile_utils import format_skill_embeddings_for_postgres
+from app.services.vector_matcher import generate_profile_and_skill_embeddings
+from app.utils.profile_utils import format_skill_embeddings_for_postgres, invalidate_profile
 
 
 router = APIRouter(prefix="/resume", tags=["resume"])
@@ -81,31 +82,30 @@ async def parse_resume(
                             print(f"🔍 Attempting to save profile for user_id: {user_id}")
                             sb = get_supabase_client()
                             
-                            # Generate profile embedding
+                            # Generate profile and skill embeddings concurrently
                             profile_embedding = None
-                            try:
-                                profile_embedding = generate_profile_embedding(
-                                    name=parsed.get("name", ""),
-                                    experience=parsed.get("experience", ""),
-                                    skills=parsed.get("skills", [])
-                                )
-                                print(f"✅ Generated profile embedding ({len(profile_embedding)} dimensions)")
-                            except Exception as e:
-                                print(f"⚠️ Error generating profile embedding: {e}")
-                                # Continue without embedding - profile will be saved without it
-                            
-                            # Generate skill embeddings
                             skills_embeddings = None
                             skills_list = parsed.get("skills", [])
+                            profile_result, skills_result = await generate_profile_and_skill_embeddings(
+                                name=parsed.get("name", ""),
+                                experience=parsed.get("experience", ""),
+                                skills=skills_list
+                            )
+                            if isinstance(profile_result, Exception):
+                                print(f"⚠️ Error generating profile embedding: {profile_result}")
+                                # Continue without embedding - profile will be saved without it
+                            else:
+                                profile_embedding = profile_result
+                                print(f"✅ Generated profile embedding ({len(profile_embedding)} dimensions)")
+                            
                             if skills_list:
-                                try:
-                                    skills_embeddings = generate_skill_embeddings(skills_list)
+                                if isinstance(skills_result, Exception):
+                                    print(f"⚠️ Error generating skill embeddings: {skills_result}")
+                                    # Continue without skill embeddings - profile will be saved without them
+                                else:
                                     # Format embeddings for PostgreSQL vector array
-                                    skills_embeddings = format_skill_embeddings_for_postgres(skills_embeddings)
+                                    skills_embeddings = format_skill_embeddings_for_postgres(skills_result)
                                     print(f"✅ Generated {len(skills_embeddings) if skills_embeddings else 0} skill embeddings")
-                                except Exception as e:
-                                    print(f"⚠️ Error generating skill embeddings: {e}")
-                                    # Continue without skill embeddings - profile will be saved without them
                             
                             profile_data = {
                                 "user_id": user_id,
@@ -116,24 +116,25 @@ async def parse_resume(
                                 "profile_embedding": profile_embedding,
                             }
                             print(f"   Profile data: {profile_data}")
-                            result = sb.table("profiles").upsert(profile_data).execute()
+                            result = await asyncio.to_thread(sb.table("profiles").upsert(profile_data).execute)
                             print(f"✅ Profile saved successfully for user_id: {user_id}")
                             
                             # Update skills_embeddings via RPC if we have them (vector arrays need special handling)
                             if skills_embeddings:
                                 try:
                                     # Pass Python list directly - Supabase converts to JSONB automatically
-                                    sb.rpc('update_skills_embeddings', {
+                                    await asyncio.to_thread(sb.rpc('update_skills_embeddings', {
                                         'p_user_id': user_id,
                                         'p_skills_embeddings': skills_embeddings  # Pass list directly, not json.dumps()
-                                    }).execute()
+                                    }).execute)
                                     print(f"✅ Updated skills_embeddings via RPC for user_id: {user_id}")
                                 except Exception as e:
                                     print(f"⚠️ Error updating skills_embeddings via RPC: {e}")
                                     # Continue - profile is saved, just without skill embeddings
+                            invalidate_profile(user_id)
                             print(f"   Result: {result.data if result.data else 'No data returned'}")
                             # Verify it was saved
-                            verify = sb.table("profiles").select("*").eq("user_id", user_id).execute()
+                            verify = await asyncio.to_thread(sb.table("profiles").select("user_id").eq("user_id", user_id).execute)
                             print(f"   Verification query returned {len(verify.data) if verify.data else 0} row(s)")
                         except Exception as e:
                             # Log full error for debugging
@@ -243,31 +244,30 @@ async def parse_resume(
             print(f"🔍 Attempting to save profile for user_id: {user_id}")
             sb = get_supabase_client()
             
-            # Generate profile embedding
+            # Generate profile and skill embeddings concurrently
             profile_embedding = None
-            try:
-                profile_embedding = generate_profile_embedding(
-                    name=parsed.get("name", ""),
-                    experience=parsed.get("experience", ""),
-                    skills=parsed.get("skills", [])
-                )
-                print(f"✅ Generated profile embedding ({len(profile_embedding)} dimensions)")
-            except Exception as e:
-                print(f"⚠️ Error generating profile embedding: {e}")
-                # Continue without embedding - profile will be saved without it
-            
-            # Generate skill embeddings
             skills_embeddings = None
             skills_list = parsed.get("skills", [])
+            profile_result, skills_result = await generate_profile_and_skill_embeddings(
+                name=parsed.get("name", ""),
+                experience=parsed.get("experience", ""),
+                skills=skills_list
+            )
+            if isinstance(profile_result, Exception):
+                print(f"⚠️ Error generating profile embedding: {profile_result}")
+                # Continue without embedding - profile will be saved without it
+            else:
+                profile_embedding = profile_result
+                print(f"✅ Generated profile embedding ({len(profile_embedding)} dimensions)")
+            
             if skills_list:
-                try:
-                    skills_embeddings = generate_skill_embeddings(skills_list)
+                if isinstance(skills_result, Exception):
+                    print(f"⚠️ Error generating skill embeddings: {skills_result}")
+                    # Continue without skill embeddings - profile will be saved without them
+                else:
                     # Format embeddings for PostgreSQL vector array
-                    skills_embeddings = format_skill_embeddings_for_postgres(skills_embeddings)
+                    skills_embeddings = format_skill_embeddings_for_postgres(skills_result)
                     print(f"✅ Generated {len(skills_embeddings) if skills_embeddings else 0} skill embeddings")
-                except Exception as e:
-                    print(f"⚠️ Error generating skill embeddings: {e}")
-                    # Continue without skill embeddings - profile will be saved without them
             
             profile_data = {
                 "user_id": user_id,
@@ -278,24 +278,25 @@ async def parse_resume(
                 "profile_embedding": profile_embedding,
             }
             print(f"   Profile data: {profile_data}")
-            result = sb.table("profiles").upsert(profile_data).execute()
+            result = await asyncio.to_thread(sb.table("profiles").upsert(profile_data).execute)
             print(f"✅ Profile saved successfully for user_id: {user_id}")
             
             # Update skills_embeddings via RPC if we have them (vector arrays need special handling)
             if skills_embeddings:
                 try:
                     # Pass Python list directly - Supabase converts to JSONB automatically
-                    sb.rpc('update_skills_embeddings', {
+                    await asyncio.to_thread(sb.rpc('update_skills_embeddings', {
                         'p_user_id': user_id,
                         'p_skills_embeddings': skills_embeddings  # Pass list directly, not json.dumps()
-                    }).execute()
+                    }).execute)
                     print(f"✅ Updated skills_embeddings via RPC for user_id: {user_id}")
                 except Exception as e:
                     print(f"⚠️ Error updating skills_embeddings via RPC: {e}")
                     # Continue - profile is saved, just without skill embeddings
+            invalidate_profile(user_id)
             print(f"   Result: {result.data if result.data else 'No data returned'}")
             # Verify it was saved
-            verify = sb.table("profiles").select("*").eq("user_id", user_id).execute()
+            verify = await asyncio.to_thread(sb.table("profiles").select("user_id").eq("user_id", user_id).execute)
             print(f"   Verification query returned {len(verify.data) if verify.data else 0} row(s)")
         except Exception as e:
             # Log full error for debugging
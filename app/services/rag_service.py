@@ -1,15 +1,73 @@
 """
 RAG (Retrieval-Augmented Generation) service for career knowledge base.
 """
+import asyncio
 from typing import List, Dict, Any
-from app.llm.embeddings import embed_texts
+from functools import lru_cache
+from app.llm.embeddings import embed_text
 from app.clients.supabase_client import get_supabase_client
-from app.llm.llm_client import get_openai_llm, create_career_coach_prompt
+from app.llm.llm_client import get_openai_llm, with_prompt_cache_key
 from app.utils.text_utils import strip_html_tags
+from langchain_core.messages import SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 
 
-def search_career_knowledge(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+# Module-level so the prompt string and template are built once, not per question.
+# The retrieved context goes in the human message, so this prefix is identical on
+# every call and stays in OpenAI's prompt cache.
+_RAG_SYSTEM_PROMPT = """You are 'Career Guidance', an expert AI Career Guidance Coach for the Indian job market. 
+Your tone is professional, encouraging, supportive, and data-driven. 
+You are a partner in the user's career journey. 
+
+CRITICAL CONTEXT REQUIREMENTS:
+- ALL information provided MUST be specific to INDIA and the Indian job market
+- ALL salary information MUST be in Indian Rupees (INR) format: ₹X LPA - ₹Y LPA (e.g., ₹8 LPA - ₹15 LPA)
+- Use REALISTIC Indian IT market salary ranges (NOT just USD conversions). Typical ranges:
+  * Software Engineer: ₹6-20 LPA (entry to senior)
+  * Data Scientist: ₹8-25 LPA
+  * Machine Learning Engineer: ₹10-30 LPA
+  * DevOps Engineer: ₹8-22 LPA
+  * Product Manager: ₹12-35 LPA
+  * Backend Developer: ₹6-18 LPA
+  * Frontend Developer: ₹5-16 LPA
+  * Full Stack Developer: ₹7-20 LPA
+- Use whole numbers only (no decimals like ₹124.5 LPA - use ₹12-25 LPA instead)
+- Job outlook, market trends, and career information should reflect the Indian job market
+- Skills, qualifications, and requirements should be relevant to Indian companies
+- If the context doesn't contain India-specific information, adapt it to the Indian context
+
+INSTRUCTIONS:
+1. If the context contains information about the career the user asked about (or closely related careers), use that information and adapt it to the Indian context.
+2. If the context mentions related careers (e.g., "Software Engineer" when asked about "Software Engineering"), use that information - they are essentially the same.
+3. If the context contains partial information, use it and provide a helpful answer based on what's available.
+4. Only say "I don't have enough information" if the context is completely unrelated to the user's question.
+5. ALWAYS adapt any salary information to REALISTIC Indian market ranges in INR format (₹X LPA - ₹Y LPA) with whole numbers only.
+6. ALWAYS make all information India-specific.
+
+CRITICAL FORMATTING RULES:
+- Use MARKDOWN format ONLY (no HTML tags whatsoever)
+- Use **bold** for emphasis, *italics* for subtle emphasis
+- Use blank lines for paragraph breaks (NOT <br>)
+- Use ### for headings if needed
+- Use - or • for lists
+- NEVER use HTML tags like <br>, <small>, <b>, <i>, <style>, or any inline CSS
+- NEVER include sources, citations, or references in your answer
+- Just provide the answer in clean Markdown format
+- Salary ranges MUST be in INR format: ₹X LPA - ₹Y LPA (e.g., ₹8 LPA - ₹15 LPA)"""
+
+
+@lru_cache(maxsize=1)
+def _get_rag_answer_chain():
+    """Chain answering a question from retrieved career context (built once, then reused)."""
+    llm = get_openai_llm(temperature=0.3)
+    prompt = ChatPromptTemplate.from_messages([
+        SystemMessage(content=_RAG_SYSTEM_PROMPT),
+        ("human", "Context from knowledge base:\n{context}\n\nQuestion: {query}")
+    ])
+    return prompt | with_prompt_cache_key(llm, "career_rag")
+
+
+async def search_career_knowledge(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
     """
     Search career_data table using vector similarity (pgvector).
     Returns top_k most relevant documents.
@@ -17,17 +75,18 @@ def search_career_knowledge(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
     sb = get_supabase_client()
     
     # Generate embedding for query
-    query_embedding = embed_texts([query])[0]
+    query_embedding = await embed_text(query)
     
     # Use Supabase RPC for vector search (if available)
     try:
         # First, try using the RPC function if it exists
         try:
-            result = sb.rpc('match_career_data', {
-                'query_embedding': str(query_embedding),  # Supabase might need string representation
+            # supabase-py is synchronous; run the request in a worker thread so it doesn't block the event loop
+            result = await asyncio.to_thread(sb.rpc('match_career_data', {
+                'query_embedding': str(query_embedding.tolist()),  # Supabase might need string representation
                 'match_threshold': 0.3,
                 'match_count': top_k
-            }).execute()
+            }).execute)
             
             if result.data:
                 documents = [
@@ -45,7 +104,9 @@ def search_career_knowledge(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
             print(f"RPC search failed, using Python fallback: {rpc_error}")
         
         # Fallback: fetch all and do similarity in Python
-        result = sb.table("career_data").select("doc_id, career_title, content_chunk, embedding").limit(100).execute()
+        result = await asyncio.to_thread(
+            sb.table("career_data").select("doc_id, career_title, content_chunk, embedding").limit(100).execute
+        )
         
         if not result.data:
             return []
@@ -75,9 +136,8 @@ def search_career_knowledge(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
                 
                 if doc_embedding and len(doc_embedding) == len(query_embedding):
                     # Convert to numpy array for dot product
-                    doc_embedding = np.array(doc_embedding)
-                    query_embedding_arr = np.array(query_embedding)
-                    similarity = np.dot(query_embedding_arr, doc_embedding)
+                    doc_embedding = np.asarray(doc_embedding, dtype=np.float32)
+                    similarity = np.dot(query_embedding, doc_embedding)
                     if similarity > 0.3:  # Threshold for relevance
                         documents.append({
                             "doc_id": row.get("doc_id"),
@@ -98,12 +158,12 @@ def search_career_knowledge(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         return []
 
 
-async def query_career_knowledge(query: str, top_k: int = 5) -> Dict[str, Any]:
+async def retrieve_career_documents(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
     """
-    RAG flow: Retrieve relevant documents and generate answer.
-    Returns answer and sources.
+    Retrieval half of the RAG flow, without generating an answer.
+    Searches a few variations of the query and merges the results.
+    Returns up to top_k documents (one per career title), best match first.
     """
-    # 1. Retrieve relevant documents
     # Try multiple query variations to improve search (e.g., "Software Engineering" vs "Software Engineer")
     query_variations = [
         query,  # Original query
@@ -112,21 +172,43 @@ async def query_career_knowledge(query: str, top_k: int = 5) -> Dict[str, Any]:
         query.replace("career", "").strip(),  # Remove generic words
     ]
     
-    # Search with all variations and combine results
+    # Search the distinct variations concurrently (often several are identical to the
+    # original query) and combine results in variation order
+    unique_queries = list(dict.fromkeys(q for q in query_variations if q and q.strip()))
+    results = await asyncio.gather(*(search_career_knowledge(q, top_k) for q in unique_queries))
     all_docs = []
     seen_titles = set()
-    for q in query_variations:
-        if q and len(q.strip()) > 0:
-            docs_found = search_career_knowledge(q, top_k)
-            for doc in docs_found:
-                title = doc.get("career_title", "")
-                if title and title not in seen_titles:
-                    all_docs.append(doc)
-                    seen_titles.add(title)
+    for docs_found in results:
+        for doc in docs_found:
+            title = doc.get("career_title", "")
+            if title and title not in seen_titles:
+                all_docs.append(doc)
+                seen_titles.add(title)
     
     # Sort by similarity and take top_k
     all_docs.sort(key=lambda x: x.get("similarity", 0.0), reverse=True)
-    docs = all_docs[:top_k] if all_docs else []
+    return all_docs[:top_k]
+
+
+def career_sources(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Source references returned to clients for retrieved documents (content omitted)."""
+    return [
+        {
+            "doc_id": doc.get("doc_id"),
+            "career_title": doc.get("career_title"),
+            "similarity": doc.get("similarity", 0.0)
+        }
+        for doc in docs
+    ]
+
+
+async def query_career_knowledge(query: str, top_k: int = 5) -> Dict[str, Any]:
+    """
+    RAG flow: Retrieve relevant documents and generate answer.
+    Returns answer and sources.
+    """
+    # 1. Retrieve relevant documents
+    docs = await retrieve_career_documents(query, top_k)
     
     if not docs:
         return {
@@ -144,55 +226,7 @@ async def query_career_knowledge(query: str, top_k: int = 5) -> Dict[str, Any]:
     context = "\n---\n".join(context_parts)
     
     # 3. Generate answer using LLM with context
-    llm = get_openai_llm(temperature=0.3)
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are 'Career Guidance', an expert AI Career Guidance Coach for the Indian job market. 
-Your tone is professional, encouraging, supportive, and data-driven. 
-You are a partner in the user's career journey. 
-
-CRITICAL CONTEXT REQUIREMENTS:
-- ALL information provided MUST be specific to INDIA and the Indian job market
-- ALL salary information MUST be in Indian Rupees (INR) format: ₹X LPA - ₹Y LPA (e.g., ₹8 LPA - ₹15 LPA)
-- Use REALISTIC Indian IT market salary ranges (NOT just USD conversions). Typical ranges:
-  * Software Engineer: ₹6-20 LPA (entry to senior)
-  * Data Scientist: ₹8-25 LPA
-  * Machine Learning Engineer: ₹10-30 LPA
-  * DevOps Engineer: ₹8-22 LPA
-  * Product Manager: ₹12-35 LPA
-  * Backend Developer: ₹6-18 LPA
-  * Frontend Developer: ₹5-16 LPA
-  * Full Stack Developer: ₹7-20 LPA
-- Use whole numbers only (no decimals like ₹124.5 LPA - use ₹12-25 LPA instead)
-- Job outlook, market trends, and career information should reflect the Indian job market
-- Skills, qualifications, and requirements should be relevant to Indian companies
-- If the context doesn't contain India-specific information, adapt it to the Indian context
-
-Context from knowledge base:
-{context}
-
-INSTRUCTIONS:
-1. If the context contains information about the career the user asked about (or closely related careers), use that information and adapt it to the Indian context.
-2. If the context mentions related careers (e.g., "Software Engineer" when asked about "Software Engineering"), use that information - they are essentially the same.
-3. If the context contains partial information, use it and provide a helpful answer based on what's available.
-4. Only say "I don't have enough information" if the context is completely unrelated to the user's question.
-5. ALWAYS adapt any salary information to REALISTIC Indian market ranges in INR format (₹X LPA - ₹Y LPA) with whole numbers only.
-6. ALWAYS make all information India-specific.
-
-CRITICAL FORMATTING RULES:
-- Use MARKDOWN format ONLY (no HTML tags whatsoever)
-- Use **bold** for emphasis, *italics* for subtle emphasis
-- Use blank lines for paragraph breaks (NOT <br>)
-- Use ### for headings if needed
-- Use - or • for lists
-- NEVER use HTML tags like <br>, <small>, <b>, <i>, <style>, or any inline CSS
-- NEVER include sources, citations, or references in your answer
-- Just provide the answer in clean Markdown format
-- Salary ranges MUST be in INR format: ₹X LPA - ₹Y LPA (e.g., ₹8 LPA - ₹15 LPA)"""),
-        ("human", "Question: {query}")
-    ])
-    
-    chain = prompt | llm
+    chain = _get_rag_answer_chain()
     
     try:
         response = await chain.ainvoke({
@@ -248,19 +282,9 @@ CRITICAL FORMATTING RULES:
                 answer = answer.strip()
                 print(f"   After last resort cleanup: {answer[:100]}...")
         
-        # Extract sources
-        sources = [
-            {
-                "doc_id": doc.get("doc_id"),
-                "career_title": doc.get("career_title"),
-                "similarity": doc.get("similarity", 0.0)
-            }
-            for doc in docs
-        ]
-        
         return {
             "answer": answer,
-            "sources": sources
+            "sources": career_sources(docs)
         }
     except Exception as e:
         return {
@@ -1,8 +1,8 @@
-import json
+import asyncio
 import re
 import os
 from typing import Dict, Any
-from app.llm.llm_client import get_openai_llm, create_resume_parser_prompt
+from app.llm.chains import get_resume_parser_chain
 
 # PDF/DOCX text extraction
 try:
@@ -29,42 +29,15 @@ async def parse_resume_text(resume_text: str) -> Dict[str, Any]:
     Parse resume text using LLM extraction.
     Returns structured data: name, email, experience, skills
     """
-    # Use LLM to extract structured data from text
-    llm = get_openai_llm(temperature=0.1)  # Low temperature for structured extraction
-    prompt = create_resume_parser_prompt()
-    chain = prompt | llm
+    # Strict function calling returns the fields as a dict - no JSON scraping needed
+    chain = get_resume_parser_chain()
     
     try:
-        response = await chain.ainvoke({"resume_text": resume_text})
-        content = response.content if hasattr(response, 'content') else str(response)
+        parsed_data = await chain.ainvoke({"resume_text": resume_text})
         
-        # Extract JSON from response (might have markdown code blocks)
-        # Try to find JSON in code blocks first
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-            try:
-                parsed_data = json.loads(json_str)
-            except json.JSONDecodeError as e:
-                print(f"Failed to parse JSON from code block: {e}")
-                parsed_data = {}
-        else:
-            # Try to find JSON object directly
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(0)
-                try:
-                    parsed_data = json.loads(json_str)
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse JSON object: {e}")
-                    parsed_data = {}
-            else:
-                # Try to parse directly
-                try:
-                    parsed_data = json.loads(content)
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse content as JSON: {e}, content: {content[:200]}")
-                    parsed_data = {}
+        # Resumes without an email come back as "" - fall back to regex / placeholder below
+        if not parsed_data.get("email"):
+            parsed_data.pop("email", None)
         
         # Additional skill extraction from text if LLM missed it
         if not parsed_data.get("skills") or len(parsed_data.get("skills", [])) == 0:
@@ -163,10 +136,11 @@ async def parse_resume_file(file_path: str) -> Dict[str, Any]:
         # Extract text based on file type
         file_ext = os.path.splitext(file_path)[1].lower()
         
+        # Text extraction is blocking file I/O + CPU work, so keep it off the event loop
         if file_ext == '.pdf':
-            resume_text = extract_text_from_pdf(file_path)
+            resume_text = await asyncio.to_thread(extract_text_from_pdf, file_path)
         elif file_ext == '.docx':
-            resume_text = extract_text_from_docx(file_path)
+            resume_text = await asyncio.to_thread(extract_text_from_docx, file_path)
         else:
             raise Exception(f"Unsupported file type: {file_ext}")
         
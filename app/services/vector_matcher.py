@@ -1,9 +1,10 @@
 """
 Vector matching service for profile-to-job and profile-to-career similarity calculations.
 """
-from typing import List
+from typing import List, Optional
+import asyncio
 import numpy as np
-from app.llm.embeddings import embed_texts
+from app.llm.embeddings import embed_text, embed_texts
 from app.utils.profile_utils import build_profile_text
 
 
@@ -36,7 +37,7 @@ def calculate_profile_similarity(
     return float(similarity)
 
 
-def generate_job_embedding(job_description: str) -> List[float]:
+async def generate_job_embedding(job_description: str) -> np.ndarray:
     """
     Generate embedding for job description.
     
@@ -44,16 +45,16 @@ def generate_job_embedding(job_description: str) -> List[float]:
         job_description: Job description text
     
     Returns:
-        Embedding vector (1536 dimensions)
+        Embedding vector (1536 dimensions, float32)
     """
     if not job_description or not job_description.strip():
         raise ValueError("Job description cannot be empty")
     
-    embedding = embed_texts([job_description])[0]
+    embedding = await embed_text(job_description)
     return embedding
 
 
-def generate_profile_embedding(
+async def generate_profile_embedding(
     name: str, 
     experience: str, 
     skills: List[str]
@@ -67,18 +68,18 @@ def generate_profile_embedding(
         skills: List of skill strings
     
     Returns:
-        Embedding vector (1536 dimensions)
+        Embedding vector (1536 dimensions) as a list, ready to store in Supabase
     """
     profile_text = build_profile_text(name, experience, skills)
     
     if not profile_text.strip():
         raise ValueError("Profile text cannot be empty")
     
-    embedding = embed_texts([profile_text])[0]
-    return embedding
+    embedding = await embed_text(profile_text)
+    return embedding.tolist()
 
 
-def generate_skill_embeddings(skills: List[str]) -> List[List[float]]:
+async def generate_skill_embeddings(skills: List[str]) -> np.ndarray:
     """
     Generate embeddings for a list of skills.
     Each skill gets its own embedding vector for semantic matching.
@@ -87,19 +88,19 @@ def generate_skill_embeddings(skills: List[str]) -> List[List[float]]:
         skills: List of skill strings (e.g., ["Python", "React", "SQL"])
     
     Returns:
-        List of embedding vectors, one per skill (each 1536 dimensions)
+        float32 array of embedding vectors, one row per skill (each 1536 dimensions)
     """
     if not skills:
-        return []
+        return np.empty((0, 0), dtype=np.float32)
     
     # Filter out empty skills
     valid_skills = [skill.strip() for skill in skills if skill and skill.strip()]
     
     if not valid_skills:
-        return []
+        return np.empty((0, 0), dtype=np.float32)
     
     # Generate embeddings for all skills in one batch (more efficient)
-    embeddings = embed_texts(valid_skills)
+    embeddings = await embed_texts(valid_skills)
     return embeddings
 
 
@@ -151,7 +152,7 @@ def find_matching_skills(
         - missing_skills: List of unmatched job skills
         - matches: List of (user_skill, job_skill, similarity) tuples
     """
-    if not user_skill_embeddings or not job_skill_embeddings:
+    if len(user_skill_embeddings) == 0 or len(job_skill_embeddings) == 0:
         return [], [], []
     
     matched_skills = []
@@ -207,7 +208,7 @@ def match_skills_semantic(
         - missing: List of unmatched job skills
         - matched_user_skills: List of user skills that matched
     """
-    if not user_skill_embeddings or not job_skill_embeddings:
+    if len(user_skill_embeddings) == 0 or len(job_skill_embeddings) == 0:
         return {
             "matched": [],
             "missing": job_skills if job_skills else [],
@@ -251,3 +252,76 @@ def match_skills_semantic(
         "matched_user_skills": matched_user_skills
     }
 
+
+
+async def classify_skill_gap(
+    user_skills: List[str],
+    job_skills: List[str],
+    match_threshold: float = 0.80,
+    ambiguous_threshold: float = 0.65
+) -> Optional[dict]:
+    """
+    Split job skills into matched/gap using embedding similarity alone.
+    Each job skill is compared against its closest user skill. The result is
+    only returned when every job skill is clear-cut, so callers can skip the
+    skill-gap LLM call and fall back to it for borderline cases.
+    
+    Args:
+        user_skills: List of user skill names
+        job_skills: List of job skill names
+        match_threshold: Minimum similarity to count a job skill as matched (default 0.80)
+        ambiguous_threshold: Similarities between this and match_threshold are ambiguous (default 0.65)
+    
+    Returns:
+        Dictionary with "matched" and "gap" lists of job skills, or None if
+        any job skill falls in the ambiguous band
+    """
+    user_skills = [s.strip() for s in user_skills if s and s.strip()]
+    job_skills = [s.strip() for s in job_skills if s and s.strip()]
+    
+    if not job_skills:
+        return {"matched": [], "gap": []}
+    if not user_skills:
+        return {"matched": [], "gap": job_skills}
+    
+    # One batch for both sides; repeated skills are served from the embedding cache
+    embeddings = await embed_texts(user_skills + job_skills)
+    user_emb = embeddings[:len(user_skills)]
+    job_emb = embeddings[len(user_skills):]
+    
+    # OpenAI embeddings are normalized, so the dot product is the cosine similarity
+    best = (job_emb @ user_emb.T).max(axis=1)
+    if np.any((best >= ambiguous_threshold) & (best < match_threshold)):
+        return None
+    
+    return {
+        "matched": [skill for skill, score in zip(job_skills, best) if score >= match_threshold],
+        "gap": [skill for skill, score in zip(job_skills, best) if score < match_threshold]
+    }
+
+
+async def generate_profile_and_skill_embeddings(
+    name: str,
+    experience: str,
+    skills: List[str]
+) -> tuple:
+    """
+    Generate the profile embedding and per-skill embeddings concurrently.
+    The two have no dependency on each other, so they run as one round trip.
+    
+    Args:
+        name: User's name
+        experience: Experience summary text
+        skills: List of skill strings
+    
+    Returns:
+        Tuple of (profile_embedding, skill_embeddings) as returned by
+        `generate_profile_embedding` / `generate_skill_embeddings`. If either
+        generation failed, its slot holds the raised exception instead.
+    """
+    profile_result, skills_result = await asyncio.gather(
+        generate_profile_embedding(name=name, experience=experience, skills=skills),
+        generate_skill_embeddings(skills),
+        return_exceptions=True
+    )
+    return profile_result, skills_result
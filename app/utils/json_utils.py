@@ -0,0 +1,20 @@
+"""
+JSON serialization shared by the routers and LLM chains.
+"""
+from typing import Any, Callable, Optional
+import orjson
+
+
+def to_json(obj: Any, default: Optional[Callable[[Any], Any]] = None, option: Optional[int] = None) -> str:
+    """
+    Serialize to compact JSON text with orjson (LLM prompt variables, SSE payloads, cache keys).
+    
+    Args:
+        obj: Value to serialize
+        default: Fallback for types orjson cannot serialize (e.g. str)
+        option: orjson option flags (e.g. orjson.OPT_SORT_KEYS)
+    
+    Returns:
+        JSON text
+    """
+    return orjson.dumps(obj, default=default, option=option).decode()
@@ -1,8 +1,19 @@
 """
 Utility functions for building profile text for embeddings.
 """
-from typing import List
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 import json
+import time
+import numpy as np
+
+
+# Profile rows recently read by the chat handlers, keyed by (user_id, columns).
+# Writers in this process call invalidate_profile; the TTL bounds staleness from
+# writes made by other instances
+_PROFILE_CACHE_TTL = 30.0  # seconds
+_PROFILE_CACHE_MAX = 1024
+_profile_cache: "OrderedDict[Tuple[str, str], Tuple[float, dict]]" = OrderedDict()
 
 
 def build_profile_text(name: str, experience: str, skills: List[str]) -> str:
@@ -33,7 +44,7 @@ def build_profile_text(name: str, experience: str, skills: List[str]) -> str:
     return "\n".join(profile_parts)
 
 
-def format_skill_embeddings_for_postgres(embeddings: List[List[float]]) -> List[List[float]]:
+def format_skill_embeddings_for_postgres(embeddings: np.ndarray | List[List[float]]) -> List[List[float]]:
     """
     Format skill embeddings for PostgreSQL vector array type.
     
@@ -41,14 +52,50 @@ def format_skill_embeddings_for_postgres(embeddings: List[List[float]]) -> List[
     via the update_skills_embeddings function if direct upsert fails.
     
     Args:
-        embeddings: List of embedding vectors (each is a list of floats)
+        embeddings: Embedding vectors (float32 array or list of lists of floats)
     
     Returns:
-        List of lists (raw format)
+        List of lists (raw format, JSON serializable)
     """
-    if not embeddings:
+    if embeddings is None or len(embeddings) == 0:
         return None
     
-    # Return raw list of lists
-    return embeddings
+    # Supabase sends JSON, so convert array rows back to plain lists
+    return np.asarray(embeddings).tolist()
+
+
+def get_cached_profile(user_id: str, columns: str) -> Optional[dict]:
+    """
+    Return a profile row cached by cache_profile, if it is still fresh.
+    
+    Args:
+        user_id: Profile user_id
+        columns: The select() column list the row was fetched with
+    
+    Returns:
+        The cached row, or None on a miss or once the TTL has passed
+    """
+    key = (user_id, columns)
+    entry = _profile_cache.get(key)
+    if entry is None:
+        return None
+    fetched_at, profile = entry
+    if time.monotonic() - fetched_at > _PROFILE_CACHE_TTL:
+        del _profile_cache[key]
+        return None
+    return profile
+
+
+def cache_profile(user_id: str, columns: str, profile: dict) -> None:
+    """Remember a fetched profile row; the oldest entries are evicted past _PROFILE_CACHE_MAX."""
+    key = (user_id, columns)
+    _profile_cache[key] = (time.monotonic(), profile)
+    _profile_cache.move_to_end(key)
+    while len(_profile_cache) > _PROFILE_CACHE_MAX:
+        _profile_cache.popitem(last=False)
+
 
+def invalidate_profile(user_id: str) -> None:
+    """Drop every cached row for user_id; call after writing to the profiles table."""
+    for key in [key for key in _profile_cache if key[0] == user_id]:
+        del _profile_cache[key]
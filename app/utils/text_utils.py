@@ -1,8 +1,11 @@
 """
-Text processing utilities for HTML stripping and job description cleaning.
+Text processing utilities for HTML stripping, job description cleaning and
+known-skill spotting.
 """
 import re
 import html
+from functools import lru_cache
+from typing import List, Tuple
 
 
 def strip_html_tags(text: str) -> str:
@@ -43,13 +46,54 @@ def strip_html_tags(text: str) -> str:
     return text.strip()
 
 
+# Common technology/framework names that should be separated
+_TECH_KEYWORDS = (
+    'Java', 'Hibernate', 'Spring Boot', 'Spring', 'Microservices', 'JSP', 'Servlets', 
+    'Struts', 'J2EE', 'React', 'Angular', 'Vue', 'Node.js', 'Python', 'Docker', 
+    'Kubernetes', 'AWS', 'Azure', 'GCP', 'Jenkins', 'GitLab', 'CI/CD', 'REST', 
+    'GraphQL', 'MongoDB', 'PostgreSQL', 'MySQL', 'Redis', 'Kafka', 'RabbitMQ',
+    'TypeScript', 'JavaScript', 'HTML5', 'CSS3', 'Redux', 'Express', 'Django', 'Flask'
+)
+
+# clean_job_description patterns, compiled once at import instead of on every call
+_CAMEL_RE = re.compile(r'([a-z0-9])([A-Z])')
+_CAP_WORD_RE = re.compile(r'[A-Z][a-z]+')
+_SEP_TECH_RE = re.compile(r'([A-Z][a-z]+)([A-Z][a-z]+)+')
+# "Key Skills:Java" -> "Key Skills: Java" and "Technology->Java" -> "Technology -> Java"
+_SEPARATOR_RE = re.compile(r':(?=[A-Za-z])|(?<=[A-Za-z])->')
+_SEPARATOR_SPACING = {':': ': ', '->': ' ->'}
+
+
+def _separate_tech_words(text: str) -> str:
+    """Split capitalised words that are run together: "TypeScript" -> "Type, Script"."""
+    return _SEP_TECH_RE.sub(lambda match: ', '.join(_CAP_WORD_RE.findall(match.group(0))), text)
+
+
+# One alternation for every keyword, sorted by length so longer names win at the
+# same position ("Spring Boot" before "Spring"); matched case-insensitively between
+# non-alphanumeric boundaries. Each match is replaced by a precomputed, space-padded
+# display form, so camel-case names are split once here rather than per call
+_TECH_KEYWORDS_SORTED = sorted(_TECH_KEYWORDS, key=len, reverse=True)
+_TECH_DISPLAY = {tech.casefold(): f' {_separate_tech_words(tech)} ' for tech in _TECH_KEYWORDS}
+_TECH_RE = re.compile(
+    r'(?<![A-Za-z0-9])(?:' + '|'.join(map(re.escape, _TECH_KEYWORDS_SORTED)) + r')(?![A-Za-z0-9])',
+    re.IGNORECASE,
+)
+
+
+# Follow-up questions about the same pasted JD re-clean identical text
+@lru_cache(maxsize=128)
 def clean_job_description(jd_text: str) -> str:
     """
     Clean and normalize job description text.
-    - Fixes skills that are run together (e.g., "JavaHibernateSpring Boot" -> "Java, Hibernate, Spring Boot")
+    - Fixes skills that are run together (e.g., "JavaHibernateSpring Boot" -> "Java Hibernate Spring Boot")
     - Adds proper spacing and formatting
     - Removes excessive whitespace
     
+    Runs three regex passes and one whitespace split over the text; each later
+    step only ever inserts spaces, so run-together words can only reappear inside
+    keyword replacements, which are split ahead of time in _TECH_DISPLAY.
+    
     Args:
         jd_text: Raw job description text
         
@@ -59,59 +103,112 @@ def clean_job_description(jd_text: str) -> str:
     if not jd_text:
         return ""
     
-    # Common technology/framework names that should be separated
-    tech_keywords = [
-        'Java', 'Hibernate', 'Spring Boot', 'Spring', 'Microservices', 'JSP', 'Servlets', 
-        'Struts', 'J2EE', 'React', 'Angular', 'Vue', 'Node.js', 'Python', 'Docker', 
-        'Kubernetes', 'AWS', 'Azure', 'GCP', 'Jenkins', 'GitLab', 'CI/CD', 'REST', 
-        'GraphQL', 'MongoDB', 'PostgreSQL', 'MySQL', 'Redis', 'Kafka', 'RabbitMQ',
-        'TypeScript', 'JavaScript', 'HTML5', 'CSS3', 'Redux', 'Express', 'Django', 'Flask'
-    ]
-    
     # Step 1: Add spaces before capital letters that follow lowercase letters or numbers
     # This helps separate "JavaHibernate" -> "Java Hibernate"
-    cleaned = re.sub(r'([a-z0-9])([A-Z])', r'\1 \2', jd_text)
+    cleaned = _CAMEL_RE.sub(r'\1 \2', jd_text)
     
     # Step 2: Separate known technology keywords that might be concatenated
-    for tech in sorted(tech_keywords, key=len, reverse=True):  # Sort by length to match longer first
-        # Pattern: word boundary or start, then tech name (case-insensitive), then word boundary or end
-        pattern = rf'(?i)(?<![A-Za-z0-9]){re.escape(tech)}(?![A-Za-z0-9])'
-        # Replace with space-padded version if not already spaced
-        cleaned = re.sub(pattern, f' {tech} ', cleaned)
-    
-    # Step 3: Fix common concatenations like "JavaHibernate" -> "Java, Hibernate"
-    # Look for patterns like "TechnologyNameTechnologyName" (capital letter sequences)
-    # This is a more aggressive approach to separate concatenated tech names
-    def separate_tech_words(match):
-        text = match.group(0)
-        # Split on capital letters but keep them
-        parts = re.findall(r'[A-Z][a-z]+', text)
-        if len(parts) > 1:
-            return ', '.join(parts)
-        return text
-    
-    # Match patterns like "JavaHibernate" or "SpringBoot" (capital letter sequences)
-    cleaned = re.sub(r'([A-Z][a-z]+)([A-Z][a-z]+)+', separate_tech_words, cleaned)
-    
-    # Step 4: Clean up multiple spaces and normalize whitespace
-    cleaned = re.sub(r'\s+', ' ', cleaned)
-    cleaned = re.sub(r'\n\s*\n', '\n\n', cleaned)  # Normalize line breaks
-    
-    # Step 5: Fix common formatting issues
-    # Remove trailing spaces from lines
-    lines = [line.strip() for line in cleaned.split('\n')]
-    cleaned = '\n'.join(lines)
-    
-    # Step 6: Ensure proper spacing around common separators
-    cleaned = re.sub(r':([A-Za-z])', r': \1', cleaned)  # "Key Skills:Java" -> "Key Skills: Java"
-    cleaned = re.sub(r'([A-Za-z])(->)', r'\1 \2', cleaned)  # "Technology->Java" -> "Technology -> Java"
-    
-    # Step 7: Fix skills list formatting (often at the end)
-    # Look for patterns like "JavaHibernateSpring Boot" and separate them
-    # Match sequences of tech-looking words (capital letters followed by lowercase)
-    tech_pattern = r'([A-Z][a-z]+(?: [A-Z][a-z]+)?)([A-Z][a-z]+)'
-    while re.search(tech_pattern, cleaned):
-        cleaned = re.sub(tech_pattern, r'\1, \2', cleaned)
-    
-    return cleaned.strip()
+    cleaned = _TECH_RE.sub(lambda match: _TECH_DISPLAY[match.group(0).casefold()], cleaned)
+    
+    # Step 3: Ensure proper spacing around common separators
+    cleaned = _SEPARATOR_RE.sub(lambda match: _SEPARATOR_SPACING[match.group(0)], cleaned)
+    
+    # Step 4: Collapse all whitespace (including line breaks) to single spaces;
+    # str.split() does this in C without the regex engine, and trims both ends
+    return ' '.join(cleaned.split())
+
+
+# Well-known technical skills, spelled the way they should be reported. Words that are
+# common in ordinary English ("Go", "REST", "Express", "Excel") are left out so they
+# cannot be picked up from prose
+_KNOWN_SKILLS = (
+    # Languages
+    'Java', 'Core Java', 'Java 8', 'Python', 'JavaScript', 'TypeScript', 'C++', 'C#', 'Golang',
+    'Rust', 'Kotlin', 'Scala', 'PHP', 'Ruby', 'Perl', 'Bash', 'Shell Scripting', 'PowerShell',
+    'SQL', 'PL/SQL', 'HTML', 'HTML5', 'CSS', 'CSS3',
+    # Java ecosystem and CS fundamentals
+    'Spring', 'Spring Boot', 'Spring MVC', 'Hibernate', 'JPA', 'JDBC', 'Maven', 'Gradle', 'JUnit',
+    'Microservices', 'Multithreading', 'Collections', 'Exception Handling', 'OOP', 'OOPs',
+    'OOP Concepts', 'Object-Oriented Programming', 'Design Patterns', 'Data Structures',
+    'Algorithms', 'J2EE', 'JSP', 'Servlets', 'Struts',
+    # Web
+    'React', 'React.js', 'React Native', 'Angular', 'Vue.js', 'Next.js', 'Node.js', 'Redux',
+    'Tailwind CSS', 'Bootstrap', 'jQuery', 'REST API', 'REST APIs', 'RESTful APIs', 'RESTful',
+    'GraphQL', 'Django', 'Flask', 'FastAPI', '.NET', 'ASP.NET', 'Laravel', 'Ruby on Rails',
+    # Data stores
+    'MySQL', 'PostgreSQL', 'Oracle', 'SQL Server', 'MongoDB', 'Redis', 'Cassandra',
+    'Elasticsearch', 'DynamoDB', 'Snowflake', 'BigQuery', 'NoSQL',
+    # Data science and AI
+    'Pandas', 'NumPy', 'Scikit-learn', 'TensorFlow', 'PyTorch', 'Keras', 'LangChain', 'LLM',
+    'Generative AI', 'Machine Learning', 'Deep Learning', 'NLP', 'Computer Vision',
+    'Statistics', 'Statistical Modeling', 'A/B Testing', 'Matplotlib', 'Seaborn', 'Power BI',
+    'Tableau', 'Hadoop', 'Spark', 'PySpark', 'Kafka', 'Airflow', 'ETL', 'Data Warehousing',
+    'Data Modeling', 'Data Analysis',
+    # Cloud and DevOps
+    'AWS', 'Azure', 'GCP', 'Google Cloud', 'Docker', 'Kubernetes', 'Terraform', 'Ansible',
+    'Jenkins', 'GitLab', 'GitHub Actions', 'CI/CD', 'DevOps', 'MLOps', 'Linux', 'Git', 'Nginx',
+    'Serverless', 'RabbitMQ',
+    # Testing and process
+    'Selenium', 'Cypress', 'Jest', 'Unit Testing', 'Test Automation', 'Agile', 'Scrum', 'JIRA',
+    # Mobile
+    'Android', 'iOS', 'Flutter',
+    # Security
+    'Cyber Security', 'Information Security', 'Network Security', 'Security Operations',
+    'Security Monitoring', 'SIEM', 'Symantec DLP', 'DLP', 'Incident Response', 'Log Analysis',
+    'Forensic Analysis', 'Vulnerability Assessment', 'Penetration Testing', 'Risk Analysis',
+    'Firewalls', 'IDS/IPS',
+)
+_KNOWN_SKILL_CANONICAL = {skill.casefold(): skill for skill in _KNOWN_SKILLS}
+# Longest names first so "Spring Boot" wins over "Spring" at the same position
+_KNOWN_SKILL_RE = re.compile(
+    r'(?<![A-Za-z0-9])(?:'
+    + '|'.join(map(re.escape, sorted(_KNOWN_SKILLS, key=len, reverse=True)))
+    + r')(?![A-Za-z0-9])',
+    re.IGNORECASE,
+)
+
+
+def extract_known_skills(jd_text: str) -> List[str]:
+    """
+    Spot well-known technical skills in job description text with one regex pass.
+    
+    Args:
+        jd_text: Job description text (ideally cleaned with clean_job_description)
+        
+    Returns:
+        Canonical skill names, deduplicated, in order of first mention
+    """
+    found = {}
+    for match in _KNOWN_SKILL_RE.finditer(jd_text or ""):
+        skill = _KNOWN_SKILL_CANONICAL[match.group(0).casefold()]
+        found.setdefault(skill, None)
+    return list(found)
+
+
+@lru_cache(maxsize=8192)
+def _norm_skill(skill: str) -> str:
+    """Case-insensitive skill key; memoized so common skills share one normalized string."""
+    return skill.strip().casefold()
 
+
+def literal_skill_gap(user_skills: List[str], job_skills: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Split job skills into literal (case-insensitive) matches and the rest.
+    Case-insensitive duplicates collapse to their first spelling; job order is kept.
+    
+    Args:
+        user_skills: Skills from the user's profile
+        job_skills: Skills required by the job
+        
+    Returns:
+        (matched, remaining): remaining still needs semantic matching
+    """
+    user_keys = frozenset(_norm_skill(s) for s in user_skills if s and s.strip())
+    job_skills_by_key = {}
+    for skill in job_skills:
+        if skill and skill.strip():
+            job_skills_by_key.setdefault(_norm_skill(skill), skill.strip())
+    matched, remaining = [], []
+    for key, skill in job_skills_by_key.items():
+        (matched if key in user_keys else remaining).append(skill)
+    return matched, remaining
@@ -6,6 +6,7 @@ import os
 import sys
 from pathlib import Path
 import time
+import asyncio
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -15,7 +16,7 @@ from app.clients.supabase_client import get_supabase_client
 from app.services.vector_matcher import generate_profile_embedding
 
 
-def backfill_embeddings():
+async def backfill_embeddings():
     """Generate embeddings for all existing profiles without embeddings."""
     sb = get_supabase_client()
     
@@ -45,7 +46,7 @@ def backfill_embeddings():
         
         try:
             # Generate embedding
-            embedding = generate_profile_embedding(
+            embedding = await generate_profile_embedding(
                 name=profile.get("name", ""),
                 experience=profile.get("experience_summary", ""),
                 skills=profile.get("skills", []) or []
@@ -78,5 +79,5 @@ def backfill_embeddings():
 
 if __name__ == "__main__":
     load_dotenv()
-    backfill_embeddings()
+    asyncio.run(backfill_embeddings())
 
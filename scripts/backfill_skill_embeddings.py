@@ -4,6 +4,7 @@ Run this after running the database migration 005_add_skills_embeddings.sql
 """
 import sys
 import os
+import asyncio
 
 # Add parent directory to path to import app modules
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,7 +13,7 @@ from app.clients.supabase_client import get_supabase_client
 from app.services.vector_matcher import generate_skill_embeddings
 
 
-def backfill_skill_embeddings():
+async def backfill_skill_embeddings():
     """Generate and backfill skill embeddings for all profiles that don't have them."""
     sb = get_supabase_client()
     
@@ -45,16 +46,16 @@ def backfill_skill_embeddings():
         try:
             # Generate skill embeddings
             print(f"🔄 Processing {user_id}: {len(skills)} skills...")
-            skill_embeddings = generate_skill_embeddings(skills)
+            skill_embeddings = await generate_skill_embeddings(skills)
             
-            if not skill_embeddings:
+            if len(skill_embeddings) == 0:
                 print(f"⚠️  No embeddings generated for {user_id}")
                 error_count += 1
                 continue
             
             # Update profile with skill embeddings
             result = sb.table("profiles").update({
-                "skills_embeddings": skill_embeddings
+                "skills_embeddings": skill_embeddings.tolist()
             }).eq("user_id", user_id).execute()
             
             if result.data:
@@ -79,7 +80,7 @@ def backfill_skill_embeddings():
 if __name__ == "__main__":
     print("🚀 Starting skill embeddings backfill...")
     print("=" * 50)
-    backfill_skill_embeddings()
+    asyncio.run(backfill_skill_embeddings())
     print("=" * 50)
     print("✅ Done!")
 
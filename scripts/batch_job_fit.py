@@ -0,0 +1,80 @@
+"""
+Script to re-score a list of job descriptions against one profile through the
+OpenAI Batch API (half price, up to 24h turnaround).
+
+Usage: python scripts/batch_job_fit.py <user_id> <jobs.json>
+where jobs.json is a JSON array of job description strings.
+"""
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from app.clients.supabase_client import get_supabase_client
+from app.llm.batch import submit_batch, wait_for_batch, get_batch_results
+from app.llm.llm_client import create_job_fit_analyst_prompt
+from app.models.schemas import JobFitResult
+
+
+def batch_job_fit(user_id: str, jobs_path: str):
+    """Submit one job-fit request per job description and print the scores."""
+    sb = get_supabase_client()
+
+    print("=" * 60)
+    print("Batch Job Fit Scoring")
+    print("=" * 60)
+
+    res = sb.table("profiles").select("*").eq("user_id", user_id).execute()
+    if not res.data:
+        print(f"❌ Profile not found for user_id: {user_id}")
+        return
+    profile = res.data[0]
+
+    job_descriptions = json.loads(Path(jobs_path).read_text(encoding="utf-8"))
+    print(f"\n📊 Scoring {len(job_descriptions)} job descriptions for {profile.get('name', user_id)}")
+
+    profile_json = json.dumps({
+        "name": profile.get("name", "") or "",
+        "email": profile.get("email", "") or "",
+        "experience": profile.get("experience_summary", "") or "",
+        "skills": profile.get("skills", []) or []
+    })
+
+    # Same forced function call as the interactive job-fit chain
+    tool = convert_to_openai_tool(JobFitResult, strict=True)
+    batch_id = submit_batch(
+        create_job_fit_analyst_prompt(),
+        [{"profile": profile_json, "job_description": jd} for jd in job_descriptions],
+        tools=[tool],
+        tool_choice={"type": "function", "function": {"name": tool["function"]["name"]}},
+        parallel_tool_calls=False,
+    )
+
+    batch = wait_for_batch(batch_id)
+    if batch.status != "completed":
+        print(f"❌ Batch {batch_id} ended with status: {batch.status}")
+        return
+
+    results = get_batch_results(batch)
+    print("\n" + "=" * 60)
+    for i, job_description in enumerate(job_descriptions):
+        body = results.get(str(i))
+        if body is None:
+            print(f"[{i + 1}] ❌ No result")
+            continue
+        tool_call = body["choices"][0]["message"]["tool_calls"][0]
+        fit = json.loads(tool_call["function"]["arguments"])
+        print(f"[{i + 1}] {fit.get('fit_score', 0)}/100 - {job_description[:60]!r}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    if len(sys.argv) != 3:
+        print("Usage: python scripts/batch_job_fit.py <user_id> <jobs.json>")
+        sys.exit(1)
+    batch_job_fit(sys.argv[1], sys.argv[2])
@@ -11,7 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from dotenv import load_dotenv
 from app.config import settings
-from app.llm.embeddings import embed_texts
+from app.llm.embeddings import embed_texts_sync
 from app.clients.supabase_client import get_supabase_client
 
 # Sample career data
@@ -67,7 +67,7 @@ def seed_career_data():
     
     # Generate embeddings for all content chunks
     content_chunks = [item["content_chunk"] for item in CAREER_DATA]
-    embeddings = embed_texts(content_chunks)
+    embeddings = embed_texts_sync(content_chunks)
     
     print(f"Generated {len(embeddings)} embeddings")
     print("Inserting career data into Supabase...")
@@ -93,7 +93,7 @@ def seed_career_data():
                 .insert({
                     "career_title": item["career_title"],
                     "content_chunk": item["content_chunk"],
-                    "embedding": embeddings[i]
+                    "embedding": embeddings[i].tolist()
                 })
                 .execute()
             )